@@ -0,0 +1,156 @@
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from beat_index import DEFAULT_COLUMNS, word_costs, word_ids
+from beatmap_merge import load_packed, merge
+from decision_table import FALLBACK_FILE, LOSS_PENALTY, SOURCES
+from gen_schedule import FREQ_WORDS, NOUNS, read_words
+from simulate import sample_pool
+
+# === Reverse Beat Index + Coverage ===
+# python beat_coverage.py [a.csv b.csv ...]   -> fallback.json (players read it at startup)
+# The beat maps are row-oriented (system word -> player words). This flips
+# them: one bitset per player word over all system words it beats, so
+# "how much does X cover", "what does {X, Y} cover together" and "which
+# blind pick costs least" are whole-array operations.
+
+
+class ReverseIndex:
+    """Player word -> packed bitset of the system words it beats.
+
+    ``weights`` (one per key, summing to 1) say how likely each system word
+    is to come up; by default every word counts the same.
+    """
+
+    def __init__(self, keys, matrix, columns=DEFAULT_COLUMNS, weights=None):
+        self.keys = list(keys)
+        self.columns = list(columns)
+        self.costs = np.array([word_costs[name] for name in self.columns], dtype=float)
+        self.bits = np.packbits(matrix.T, axis=1)  # (columns, ceil(words / 8)) uint8
+        if weights is None or not np.any(weights):
+            weights = np.ones(len(self.keys))
+        self.weights = np.asarray(weights, dtype=float) / np.sum(weights)
+
+    @classmethod
+    def from_csv(cls, paths=SOURCES, columns=DEFAULT_COLUMNS, weigh=True):
+        """Majority-merge the beat maps; weigh words by game frequency like simulate.py."""
+        maps = [load_packed(path, columns) for path in paths if os.path.exists(path)]
+        if not maps:
+            raise FileNotFoundError(f"none of {paths} exist")
+        packed = maps[0] if len(maps) == 1 else merge(maps, "majority")
+        weights = game_weights(packed.keys) if weigh else None
+        return cls(packed.keys, packed.bools(), columns, weights)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _unpack(self, bits):
+        return np.unpackbits(bits, axis=-1, count=len(self.keys)).astype(bool)
+
+    # === Set Queries ===
+    def column(self, name):
+        return self.bits[self.columns.index(name)]
+
+    def beaten_by(self, name):
+        """System words ``name`` beats."""
+        return [self.keys[i] for i in self._unpack(self.column(name)).nonzero()[0]]
+
+    def union(self, names):
+        covered = np.zeros_like(self.bits[0])
+        for name in names:
+            covered |= self.column(name)
+        return covered
+
+    def coverage(self, names=None, weighted=True):
+        """Share of system words beaten by any of ``names`` (each column alone if None)."""
+        if names is None:
+            hits = self._unpack(self.bits)
+        else:
+            hits = self._unpack(self.union(names))
+        if weighted:
+            return hits @ self.weights
+        return hits.mean(axis=-1)
+
+    # === Fallback + Cover ===
+    def fallback_ranking(self, penalty=LOSS_PENALTY):
+        """(name, expected cost, coverage) for every column, best blind pick first.
+
+        A blind pick costs its price plus ``penalty`` times the chance it
+        doesn't beat a word drawn with ``weights``.
+        """
+        coverage = self.coverage()
+        expected = self.costs + penalty * (1 - coverage)
+        return sorted(
+            ((name, float(e), float(c)) for name, e, c in zip(self.columns, expected, coverage)),
+            key=lambda row: (row[1], word_ids[row[0]]),
+        )
+
+    def greedy_cover(self, target=1.0):
+        """Cheapest set of player words whose union covers ``target`` of the
+        coverable weight: repeatedly take the word with the most newly covered
+        weight per unit cost. Returns [(name, cost, cumulative coverage)]."""
+        coverable = self._unpack(np.bitwise_or.reduce(self.bits, axis=0)) @ self.weights
+        covered = np.zeros_like(self.bits[0])
+        total, picked = 0.0, []
+        while total < target * coverable - 1e-12:
+            gain = self._unpack(self.bits & ~covered) @ self.weights
+            best = int(np.argmax(gain / self.costs))
+            if gain[best] <= 0:
+                break
+            covered |= self.bits[best]
+            total += gain[best]
+            picked.append((self.columns[best], int(self.costs[best]), float(total)))
+        return picked
+
+
+def game_weights(keys):
+    """How often each key comes up as a system word, per simulate.py's sampling."""
+    words, p = sample_pool(keys, read_words(FREQ_WORDS), read_words(NOUNS))
+    weight_of = dict(zip(words, p))
+    return np.array([weight_of.get(key, 0.0) for key in keys])
+
+
+# === Precomputed Fallback ===
+def write_fallback(path=FALLBACK_FILE, sources=SOURCES):
+    index = ReverseIndex.from_csv(sources)
+    ranking = index.fallback_ranking()
+    name, expected, coverage = ranking[0]
+    result = {
+        "word": name,
+        "word_id": word_ids[name],
+        "expected_cost": round(expected, 3),
+        "coverage": round(coverage, 4),
+        "words": len(index),
+        "sources": [s for s in sources if os.path.exists(s)],
+        "ranking": [{"word": n, "expected_cost": round(e, 3), "coverage": round(c, 4)} for n, e, c in ranking[:10]],
+        "cover": [{"word": n, "cost": c, "coverage": round(t, 4)} for n, c, t in index.greedy_cover()],
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(result, f, indent=2)
+    os.replace(tmp_path, path)
+    return index, result
+
+
+if __name__ == "__main__":
+    # Usage: python beat_coverage.py [a.csv b.csv ...]  (rebuild after generating)
+    started = time.perf_counter()
+    index, result = write_fallback(sources=sys.argv[1:] or SOURCES)
+    print(f"✅ Reverse index over {len(index)} words in {time.perf_counter() - started:.2f}s -> {FALLBACK_FILE}")
+    print(f"🛟 Fallback: {result['word']} (ID {result['word_id']}), expected ${result['expected_cost']}, "
+          f"beats {result['coverage']:.1%} of weighted words")
+    coverage = index.coverage()
+    print("\n📊 Most coverage per unit cost:")
+    for j in sorted(range(len(index.columns)), key=lambda j: -coverage[j] / index.costs[j])[:10]:
+        print(f"   {index.columns[j]:<18} ${int(index.costs[j]):<3} {coverage[j]:>6.1%}  "
+              f"({coverage[j] / index.costs[j]:.2%} per $)")
+    print("\n🧩 Greedy cheapest cover:")
+    for shown, row in enumerate(result["cover"], 1):
+        print(f"   + {row['word']:<18} ${row['cost']:<3} -> {row['coverage']:.1%}")
+        if row["coverage"] >= 0.95 and shown < len(result["cover"]):
+            print(f"   ... {len(result['cover']) - shown} more for the last {result['cover'][-1]['coverage'] - row['coverage']:.1%}")
+            break
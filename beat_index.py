@@ -0,0 +1,200 @@
+import csv
+import os
+
+# === Word Cost Reference (from hackathon docs) ===
+# Dict order is the server's word ID order: ID = position + 1
+word_costs = {
+    "Feather": 1, "Coal": 1, "Pebble": 1, "Leaf": 2, "Paper": 2, "Rock": 2,
+    "Water": 3, "Twig": 3, "Sword": 4, "Shield": 4, "Gun": 5, "Flame": 5,
+    "Rope": 5, "Disease": 6, "Cure": 6, "Bacteria": 6, "Shadow": 7, "Light": 7,
+    "Virus": 7, "Sound": 8, "Time": 8, "Fate": 8, "Earthquake": 9, "Storm": 9,
+    "Vaccine": 9, "Logic": 10, "Gravity": 10, "Robots": 10, "Stone": 11,
+    "Echo": 11, "Thunder": 12, "Karma": 12, "Wind": 13, "Ice": 13,
+    "Sandstorm": 13, "Laser": 14, "Magma": 14, "Peace": 14, "Explosion": 15,
+    "War": 15, "Enlightenment": 15, "Nuclear Bomb": 16, "Volcano": 16,
+    "Whale": 17, "Earth": 17, "Moon": 17, "Star": 18, "Tsunami": 18,
+    "Supernova": 19, "Antimatter": 19, "Plague": 20, "Rebirth": 20,
+    "Tectonic Shift": 21, "Gamma-Ray Burst": 22, "Human Spirit": 23,
+    "Apocalyptic Meteor": 24, "Earth's Core": 25, "Neutron Star": 26,
+    "Supermassive Black Hole": 35, "Entropy": 45
+}
+word_ids = {word: i + 1 for i, word in enumerate(word_costs)}
+
+# Too expensive to ever be worth playing
+BANNED_WORDS = {"Supermassive Black Hole", "Entropy"}
+
+# Column layout of the generated CSVs (the 58 playable words)
+DEFAULT_COLUMNS = [w for w in word_costs if w not in BANNED_WORDS]
+
+
+def normalize_key(word):
+    return word.strip().lower()
+
+
+# === CSV Reading ===
+def read_beat_csv(path):
+    """Return (columns, rows) where rows yields (word, bits) tuples.
+
+    Tolerates the quirks of the generated files: headerless CSVs (generation
+    overwrote the header), repeated header rows and blank lines.
+    """
+    f = open(path, newline="", encoding="utf-8")
+    reader = csv.reader(f)
+    first = next(reader, None)
+    if first is None:
+        f.close()
+        return list(DEFAULT_COLUMNS), iter(())
+
+    if first[0].strip().lower() == "word" and first[1:] and first[1] not in ("0", "1"):
+        columns = [c.strip() for c in first[1:]]
+        pending = []
+    else:
+        columns = list(DEFAULT_COLUMNS)
+        pending = [first]
+
+    def rows():
+        try:
+            for row in _chain(pending, reader):
+                if not row or not row[0].strip():
+                    continue
+                cells = row[1:]
+                if cells and cells[0].strip() == columns[0]:
+                    continue  # repeated header
+                yield row[0].strip(), [1 if c.strip() == "1" else 0 for c in cells]
+        finally:
+            f.close()
+
+    return columns, rows()
+
+
+def _chain(first, rest):
+    yield from first
+    yield from rest
+
+
+# === CSV Writing ===
+class CsvSink:
+    """Appends finished batches to a beat-map CSV, writing the header once."""
+
+    def __init__(self, path, columns=DEFAULT_COLUMNS):
+        self.path = path
+        self.columns = list(columns)
+
+    def __call__(self, batch, rows):
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, "a", newline="") as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(["word"] + self.columns)
+            writer.writerows(rows)
+
+
+# === Bitset Index ===
+class BeatIndex:
+    """Beat map packed as one int bitmask per system word.
+
+    Bit k stands for the k-th cheapest column, so the cheapest allowed beater
+    of a word is the lowest set bit of ``mask & allowed``.
+    """
+
+    def __init__(self, columns=DEFAULT_COLUMNS, costs=word_costs, banned=BANNED_WORDS):
+        self.columns = list(columns)
+        # Stable sort: equal costs keep CSV column order
+        self.order = sorted(range(len(self.columns)), key=lambda i: (costs[self.columns[i]], i))
+        self.bit_names = [self.columns[i] for i in self.order]
+        self.bit_costs = [costs[name] for name in self.bit_names]
+        self.bit_ids = [word_ids[name] for name in self.bit_names]
+        self.bit_of = {name: bit for bit, name in enumerate(self.bit_names)}
+        # CSV column position -> bit, for packing rows
+        self._column_bits = [1 << self.bit_of[name] for name in self.columns]
+        self.allowed_mask = self.mask_for(n for n in self.bit_names if n not in banned)
+        self.masks = {}
+
+    @classmethod
+    def from_csv(cls, path, **kwargs):
+        columns, rows = read_beat_csv(path)
+        index = cls(columns, **kwargs)
+        for word, bits in rows:
+            index.add(word, bits)
+        return index
+
+    def __len__(self):
+        return len(self.masks)
+
+    def __contains__(self, word):
+        return normalize_key(word) in self.masks
+
+    def keys(self):
+        return self.masks.keys()
+
+    def pack(self, bits):
+        mask = 0
+        for bit, flag in zip(self._column_bits, bits):
+            if flag:
+                mask |= bit
+        return mask
+
+    def add(self, word, bits):
+        # Last row wins, like the old dict-of-lists loader
+        self.masks[normalize_key(word)] = self.pack(bits)
+
+    def add_mask(self, word, mask):
+        self.masks[normalize_key(word)] = mask
+
+    def mask_for(self, names):
+        mask = 0
+        for name in names:
+            mask |= 1 << self.bit_of[name]
+        return mask
+
+    def mask_of(self, word):
+        return self.masks.get(normalize_key(word))
+
+    # === Queries ===
+    def cheapest(self, word, allowed=None):
+        """Return (word_id, name, cost) of the cheapest allowed beater.
+
+        None means the word is unknown or has no allowed beater; use
+        ``word in index`` to tell the two apart.
+        """
+        mask = self.mask_of(word)
+        if mask is None:
+            return None
+        return self.cheapest_in_mask(mask, allowed)
+
+    def cheapest_in_mask(self, mask, allowed=None):
+        mask &= self.allowed_mask if allowed is None else allowed
+        if not mask:
+            return None
+        bit = (mask & -mask).bit_length() - 1
+        return self.bit_ids[bit], self.bit_names[bit], self.bit_costs[bit]
+
+    def cheapest_many(self, words, allowed=None):
+        allowed = self.allowed_mask if allowed is None else allowed
+        mask_of = self.mask_of
+        results = []
+        for word in words:
+            mask = mask_of(word)
+            results.append(None if mask is None else self.cheapest_in_mask(mask, allowed))
+        return results
+
+    def beaters(self, word, allowed=None):
+        """All allowed beaters of ``word`` as (word_id, name, cost), cheapest first."""
+        mask = self.mask_of(word)
+        if mask is None:
+            return []
+        mask &= self.allowed_mask if allowed is None else allowed
+        out = []
+        while mask:
+            low = mask & -mask
+            bit = low.bit_length() - 1
+            out.append((self.bit_ids[bit], self.bit_names[bit], self.bit_costs[bit]))
+            mask ^= low
+        return out
+
+    def row_bits(self, word):
+        """Unpack a word back into CSV column order (0/1 list)."""
+        mask = self.mask_of(word)
+        if mask is None:
+            return None
+        return [1 if mask & bit else 0 for bit in self._column_bits]
@@ -0,0 +1,238 @@
+import csv
+import json
+import os
+import struct
+import sys
+import zlib
+
+from beat_index import BeatIndex, normalize_key, read_beat_csv
+from beatmap_bin import compile_index
+from beat_prompts import your_words
+
+# === Journal Format ===
+# File header: magic "WOPJ" | u16 version | u16 reserved | u32 len | columns JSON
+# Then records: u32 crc32(body) | u32 len(body) | body
+#   body = u8 type | payload
+#   ROW:    u16 word_len | word utf-8 | u64 bits (bit i = CSV column i)
+#   COMMIT: u32 rows in batch
+# Rows only count once their COMMIT is on disk, so a crash mid-batch loses
+# that batch and nothing else.
+MAGIC = b"WOPJ"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sHHI")
+RECORD_HEADER = struct.Struct("<II")
+ROW, COMMIT = 1, 2
+# Smallest valid body per type: a zero-filled tail (crc32(b"") == 0) fails these
+MIN_BODY = {ROW: 1 + 2 + 8, COMMIT: 1 + 4}
+
+
+def _record(kind, payload):
+    body = bytes([kind]) + payload
+    return RECORD_HEADER.pack(zlib.crc32(body), len(body)) + body
+
+
+def _pack_bits(bits):
+    mask = 0
+    for i, flag in enumerate(bits):
+        if flag:
+            mask |= 1 << i
+    return mask
+
+
+class BeatJournal:
+    """Append-only, checksummed store of generated beat-map rows.
+
+    Opening the journal replays it once (O(1) per record) into ``rows``,
+    keyed by normalized word with the last write winning, and truncates any
+    torn tail left by a crash. With ``read_only=True`` (a reader while a
+    generation run is still appending) nothing is created or truncated; an
+    unfinished batch is simply not visible yet.
+    """
+
+    def __init__(self, path, columns=your_words, read_only=False):
+        if len(columns) > 64:
+            raise ValueError("journal rows hold at most 64 columns")
+        self.path = path
+        self.columns = list(columns)
+        self.read_only = read_only
+        self.rows = {}  # normalized word -> (word, mask)
+        self.batches = 0
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._replay()
+        elif read_only:
+            raise FileNotFoundError(f"no beat journal at {path}")
+        else:
+            header = json.dumps(self.columns).encode("utf-8")
+            with open(path, "wb") as f:
+                f.write(FILE_HEADER.pack(MAGIC, VERSION, 0, len(header)) + header)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _parse(self, body):
+        """(type, payload) of one checksummed body; raises on a malformed one."""
+        kind = body[0]
+        if len(body) < MIN_BODY.get(kind, len(body) + 1):
+            raise ValueError(f"short or unknown record type {kind}")
+        if kind == ROW:
+            (word_len,) = struct.unpack_from("<H", body, 1)
+            if len(body) != 3 + word_len + 8:
+                raise ValueError("row length mismatch")
+            word = body[3:3 + word_len].decode("utf-8")
+            (mask,) = struct.unpack_from("<Q", body, 3 + word_len)
+            return ROW, (word, mask)
+        (count,) = struct.unpack_from("<I", body, 1)
+        return COMMIT, count
+
+    def _replay(self):
+        with open(self.path, "rb") as f:
+            data = f.read()
+        magic, version, _, header_len = FILE_HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a version {VERSION} beat journal")
+        self.columns = json.loads(data[FILE_HEADER.size:FILE_HEADER.size + header_len])
+
+        pos = good = FILE_HEADER.size + header_len
+        pending = []
+        while pos + RECORD_HEADER.size <= len(data):
+            crc, length = RECORD_HEADER.unpack_from(data, pos)
+            body = data[pos + RECORD_HEADER.size:pos + RECORD_HEADER.size + length]
+            if length < 1 or len(body) < length or zlib.crc32(body) != crc:
+                break
+            try:
+                kind, payload = self._parse(body)
+            except (ValueError, struct.error):
+                break  # torn or zero-filled tail
+            pos += RECORD_HEADER.size + length
+            if kind == ROW:
+                pending.append(payload)
+            else:
+                count = payload
+                if count != len(pending):
+                    break
+                for word, mask in pending:
+                    self.rows[normalize_key(word)] = (word, mask)
+                pending = []
+                self.batches += 1
+                good = pos
+
+        if good < len(data) and not self.read_only:
+            print(f"⚠️  Dropping {len(data) - good} bytes of uncommitted/torn journal tail in {self.path}")
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+
+    # === Writing ===
+    def commit(self, rows):
+        """Append one batch of CSV-style rows ([word, 0/1, ...]) atomically."""
+        rows = list(rows)
+        chunks = []
+        for row in rows:
+            word = row[0].strip().encode("utf-8")
+            chunks.append(_record(ROW, struct.pack("<H", len(word)) + word
+                                  + struct.pack("<Q", _pack_bits(row[1:]))))
+        chunks.append(_record(COMMIT, struct.pack("<I", len(rows))))
+        with open(self.path, "ab") as f:
+            f.write(b"".join(chunks))
+            f.flush()
+            os.fsync(f.fileno())
+        for row in rows:
+            word = row[0].strip()
+            self.rows[normalize_key(word)] = (word, _pack_bits(row[1:]))
+        self.batches += 1
+
+    def __call__(self, batch, rows):
+        # Lets the journal act as a gen_pipeline sink
+        self.commit(rows)
+
+    def import_csv(self, csv_path, chunk=500):
+        """Seed the journal from an existing CSV, skipping words already in it.
+
+        A word repeated in the CSV keeps its last row. Returns how many words were added.
+        """
+        columns, rows = read_beat_csv(csv_path)
+        position = {name: i for i, name in enumerate(columns)}
+        order = [position.get(name) for name in self.columns]
+        latest = {}  # last row wins, like BeatIndex.add
+        for word, bits in rows:
+            key = normalize_key(word)
+            if key not in self.rows:
+                latest[key] = [word] + [bits[i] if i is not None and i < len(bits) else 0 for i in order]
+        batch = list(latest.values())
+        for start in range(0, len(batch), chunk):
+            self.commit(batch[start:start + chunk])
+        return len(batch)
+
+    # === Reading ===
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, word):
+        return normalize_key(word) in self.rows
+
+    def processed_keys(self):
+        return self.rows.keys()
+
+    def iter_rows(self):
+        n = len(self.columns)
+        for word, mask in self.rows.values():
+            yield [word] + [(mask >> i) & 1 for i in range(n)]
+
+    # === Compaction ===
+    def compact_csv(self, out_path):
+        """Write the canonical deduplicated CSV (first-seen order, last write wins)."""
+        tmp_path = out_path + ".tmp"
+        with open(tmp_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["word"] + self.columns)
+            writer.writerows(self.iter_rows())
+        os.replace(tmp_path, out_path)
+        return len(self.rows)
+
+    def to_index(self):
+        index = BeatIndex(self.columns)
+        for row in self.iter_rows():
+            index.add(row[0], row[1:])
+        return index
+
+    def compact_bmap(self, out_path):
+        return compile_index(self.to_index(), out_path)
+
+
+def default_journal_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".journal"
+
+
+def open_journal(csv_path):
+    """Open the journal next to ``csv_path``, seeding it from the CSV on first use.
+
+    Seeding goes to a side file that is renamed into place once complete, so
+    a crash mid-import leaves no journal and the next run seeds again
+    (instead of compacting a half-seeded journal over the CSV). An existing
+    journal picks up words added to the CSV since (merges, hand edits), so
+    compacting it back over the CSV doesn't drop them.
+    """
+    path = default_journal_path(csv_path)
+    if not os.path.exists(csv_path):
+        return BeatJournal(path)
+    if os.path.exists(path):
+        journal = BeatJournal(path)
+        added = journal.import_csv(csv_path)
+        if added:
+            print(f"📒 Imported {added} words added to {csv_path} since the last run")
+        return journal
+    seed_path = path + ".seed"
+    if os.path.exists(seed_path):
+        os.remove(seed_path)  # left by a crashed import
+    journal = BeatJournal(seed_path)
+    journal.import_csv(csv_path)
+    os.replace(seed_path, path)
+    journal.path = path
+    print(f"📒 Seeded {path} from {csv_path} ({len(journal)} words)")
+    return journal
+
+
+if __name__ == "__main__":
+    # Usage: python beat_journal.py beat_map.csv  -> rewrites the CSV deduplicated
+    for csv_path in sys.argv[1:]:
+        journal = open_journal(csv_path)
+        count = journal.compact_csv(csv_path)
+        print(f"✅ Compacted {journal.path} -> {csv_path} ({count} words)")
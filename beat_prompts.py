@@ -0,0 +1,291 @@
+import re
+
+# Your 58 powerful words (excluding Supermassive Black Hole and Entropy)
+your_words = [
+    "Feather", "Coal", "Pebble", "Leaf", "Paper", "Rock", "Water", "Twig", "Sword", "Shield",
+    "Gun", "Flame", "Rope", "Disease", "Cure", "Bacteria", "Shadow", "Light", "Virus", "Sound",
+    "Time", "Fate", "Earthquake", "Storm", "Vaccine", "Logic", "Gravity", "Robots", "Stone", "Echo",
+    "Thunder", "Karma", "Wind", "Ice", "Sandstorm", "Laser", "Magma", "Peace", "Explosion", "War",
+    "Enlightenment", "Nuclear Bomb", "Volcano", "Whale", "Earth", "Moon", "Star", "Tsunami",
+    "Supernova", "Antimatter", "Plague", "Rebirth", "Tectonic Shift", "Gamma-Ray Burst",
+    "Human Spirit", "Apocalyptic Meteor", "Earth's Core", "Neutron Star"
+]
+
+
+# Build the Gemini prompt
+def build_batch_prompt(target_words):
+    return f"""
+You are playing a metaphorical combat game where every word is a weapon. You must determine which of the following 58 words can beat each given target word.
+
+Each player word can beat certain types of targets in poetic, symbolic, physical, scientific, or emotional ways.
+
+A word "beats" another if it can overpower, destroy, disable, outmatch, nullify, counteract, or metaphorically dominate it.
+
+## Examples of reasoning:
+- Choose **Gun**, or **Sword**, **Disease** for everything alive that can be killed (e.g., "Lion", "Intruder").
+- Choose **Water**, **Tsunami**, or **Ice** for things that can be extinguished or overwhelmed (e.g., "Flame", "Fire", "Desert").
+- Choose **Rock**, **Earthquake**, or **Explosion** for things that can be physically broken or destroyed (e.g., "Glass", "PC", "Statue").
+- Choose **Rope** or **Gravity** for something that can be tied down, restrained, or pulled (e.g., "Balloon", "Drone", "Elevator").
+- Choose **Logic**, **Time**, or **Enlightenment** for abstract concepts (e.g., "Fear", "Ignorance", "Superstition").
+- Choose **Vaccine** or **Cure** for diseases or biological threats (e.g., "Virus", "Plague").
+- Choose **Sound**, **Echo**, or **Thunder** for silence, secrecy, or communication-related ideas (e.g., "Mute", "Silence", "Secret").
+- Choose **Human Spirit**, **Patience**, or **Peace** for emotional or psychological states (e.g., "Hatred", "Grief", "Anxiety").
+- Choose **Magma** or **Sandstorm** for landscapes or environments that can be reshaped or eroded.
+- Choose **Time** or **Entropy** for things that naturally decay or fade (e.g., "Memory", "Youth", "Beauty").
+
+⚠️ Do not include player words unless there is a **clear and justifiable reason** to do so — based on either real-world logic or strong symbolic metaphor.
+
+---
+
+Your task:
+
+For each of the following {len(target_words)} target words, return a list of player words (from the 58 below) that beat it.
+
+Target words:
+{chr(10).join(f"- {w}" for w in target_words)}
+
+Player words:
+{', '.join(your_words)}
+
+Return ONLY a JSON object with one entry per target word. Each value should be a list of player words. Example:
+{{
+  "Lion": ["Gun", "Sword"],
+  "Fire": ["Water", "Ice", "Tsunami"],
+  "Fear": ["Logic", "Human Spirit", "Peace"]
+}}
+"""
+
+
+_FENCE = re.compile(r"```[a-zA-Z]*\s*(.*?)(?:```|$)", re.DOTALL)
+
+
+def fenced_block(text):
+    """Contents of the first code fence holding a JSON object, or None."""
+    for match in _FENCE.finditer(text):
+        if "{" in match.group(1):
+            return match.group(1)
+    return None
+
+
+# Clean markdown/code block if needed; a fenced block wins over prose around it
+def extract_json_text(text):
+    text = text.strip()
+    if "```" in text:
+        text = fenced_block(text) or text
+        match = re.search(r"\{.*\}", text, re.DOTALL)
+        if match:
+            text = match.group(0)
+    return text
+
+
+# === Tolerant Streaming Parser ===
+# Models answer with "almost JSON": code fences, // comments, single quotes,
+# trailing commas, keys in any case. The parser below reads that shape
+# incrementally, so entries can be used while the response is still arriving.
+_SIGNIFICANT = re.compile(r"""[{}\[\]"'/:,]""")
+_MARKUP = re.compile(r"[*_`]")
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+_CLOSERS = ",:]}"
+
+
+def match_key(word):
+    """Key used to line up model output with targets: case, spacing and **markup** ignored."""
+    return " ".join(_MARKUP.sub("", word).lower().split())
+
+
+class BeatStreamParser:
+    """Incremental parser for ``{"target": ["player word", ...], ...}`` answers.
+
+    ``feed`` takes the next chunk of text and returns the (target, beaters)
+    entries it completed; ``close`` flushes the rest. A single-quoted string
+    only ends at a quote followed by , : ] or } so "Earth's Core" survives
+    either quoting style. Entries completed before a response breaks off
+    are kept in ``results``. With ``targets`` given, keys are matched to
+    them through ``match_key`` and unknown keys are ignored; beaters are
+    matched to ``allowed_words`` the same way and deduplicated.
+
+    Only ``"key": "word"`` and ``"key": ["word", ...]`` entries are read;
+    any other value (a nested object, a number, a list of lists) skips its
+    entry rather than recording that nothing beats the key. An object with
+    no entries (``{JSON}`` in the prose before a code fence) doesn't end
+    the answer; the parser keeps looking for the next one.
+    """
+
+    def __init__(self, targets=None, allowed_words=your_words):
+        self.targets = None if targets is None else {match_key(t): t for t in targets}
+        self.allowed = {match_key(w): w for w in allowed_words}
+        self.results = {}
+        self.finished = False  # the top-level object has closed
+        self._buf = ""
+        self._depth = 0
+        self._key = None
+        self._colon = False  # a ':' followed the current key
+        self._values = None
+        self._empty = False  # an object closed without entries
+        self._entries = 0  # entries read from the current object, used or not
+
+    def feed(self, text):
+        self._buf += text
+        return self._scan(final=False)
+
+    def close(self):
+        out = self._scan(final=True)
+        if self._empty and not self.results:
+            self.finished = True  # an honest {} after all
+        return out
+
+    def _scan(self, final):
+        out = []
+        buf, i, n = self._buf, 0, len(self._buf)
+        while not self.finished:
+            if self._depth == 0:
+                i = buf.find("{", i)
+                if i < 0:
+                    i = n
+                    break
+                self._depth = 1
+                self._entries = 0
+                i += 1
+                continue
+            match = _SIGNIFICANT.search(buf, i)
+            if match is None:
+                i = n
+                break
+            i = match.start()
+            c = buf[i]
+            if c == "/":
+                if i + 1 == n and not final:
+                    break  # can't tell a comment yet
+                if buf.startswith("//", i):
+                    end = buf.find("\n", i)
+                    if end < 0:
+                        if not final:
+                            break
+                        end = n
+                    i = end
+                i += 1
+            elif c in "\"'":
+                end, value = self._string(buf, i, final)
+                if end is None:
+                    break  # string continues in the next chunk
+                i = end
+                if value is not None:
+                    self._on_string(value, out)
+            elif c in ":,":
+                if self._depth == 1:
+                    if c == ":" and self._key is not None:
+                        self._colon = True
+                    else:
+                        self._key, self._colon = None, False  # "Lion": 5, -> skip Lion
+                i += 1
+            else:
+                self._on_bracket(c, out)
+                i += 1
+        self._buf = buf[i:]
+        return out
+
+    def _string(self, buf, i, final):
+        """(end, value) of the string starting at ``i``; (None, None) if it isn't complete yet."""
+        quote, n = buf[i], len(buf)
+        chars = []
+        j = i + 1
+        while j < n:
+            c = buf[j]
+            if c == "\\":
+                if j + 1 == n:
+                    break
+                nxt = buf[j + 1]
+                if nxt == "u":
+                    if j + 6 > n:
+                        break
+                    chars.append(chr(int(buf[j + 2:j + 6], 16)))
+                    j += 6
+                    continue
+                chars.append(_ESCAPES.get(nxt, nxt))
+                j += 2
+                continue
+            if c == quote:
+                if quote == '"':
+                    return j + 1, "".join(chars)
+                k = j + 1
+                while k < n and buf[k].isspace():
+                    k += 1
+                if k == n and not final:
+                    break  # need the next character to decide
+                if k == n or buf[k] in _CLOSERS:
+                    return j + 1, "".join(chars)
+            chars.append(c)  # apostrophe inside a single-quoted word
+            j += 1
+        return (n, None) if final else (None, None)
+
+    def _on_string(self, value, out):
+        if self._depth == 1:
+            if self._key is not None and self._colon:
+                self._values = [value]  # "Lion": "Gun"
+                self._emit(out)
+            else:
+                self._key = value
+        elif self._depth == 2 and self._values is not None:
+            self._values.append(value)
+
+    def _on_bracket(self, c, out):
+        if c in "{[":
+            self._depth += 1
+            if c == "[" and self._depth == 2 and self._key is not None and self._colon:
+                self._values = []
+            else:
+                self._values = None  # nested object or list: not an entry we understand
+        else:
+            if self._depth == 2 and self._values is not None:
+                self._emit(out)
+            self._depth -= 1
+            if self._depth == 1:
+                self._key, self._colon, self._values = None, False, None  # that value is over
+            elif self._depth == 0:
+                if self._entries:
+                    self.finished = True
+                else:
+                    self._empty = True  # "{JSON}" in prose, or {}: keep looking
+
+    def _emit(self, out):
+        key, values = self._key, self._values
+        self._key, self._colon, self._values = None, False, None
+        self._entries += 1
+        target = key.strip() if self.targets is None else self.targets.get(match_key(key))
+        if target is None:
+            return
+        beaters = []
+        for value in values:
+            word = self.allowed.get(match_key(value))
+            if word is not None and word not in beaters:
+                beaters.append(word)
+        self.results[target] = beaters
+        out.append((target, beaters))
+
+
+def parse_beats(text, targets=None, allowed_words=your_words):
+    """Parse a whole response, preferring a fenced block if it has one;
+    raises ValueError if it holds no complete entry."""
+    parser = BeatStreamParser(targets, allowed_words)
+    parser.feed(fenced_block(text) or text)
+    parser.close()
+    if not parser.results and not parser.finished:
+        raise ValueError("no complete entries in response")
+    return parser.results
+
+
+# Clean and filter Gemini's JSON response
+def clean_and_filter_json(text, allowed_words):
+    return parse_beats(text, None, allowed_words)
+
+
+# Turn parsed results into CSV rows for one batch. Words the model didn't
+# answer get no row (rather than an all-zero one) so they can be retried.
+def batch_rows(batch, results):
+    matched = {match_key(k): v for k, v in results.items()}
+    rows = []
+    for word in batch:
+        beaters = matched.get(match_key(word))
+        if beaters is not None:
+            rows.append([word] + [1 if w in beaters else 0 for w in your_words])
+    return rows
@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+
+from beat_index import normalize_key
+from beat_journal import BeatJournal
+from beatmap_bin import load_index
+
+# === Hot-Reloading Beat Map ===
+# A background thread watches the beat-map CSV and, once it has stopped
+# changing, loads a fresh index off the round loop and swaps it in with a
+# single reference assignment. Lookups read that reference once, so they see
+# either the old map or the new one, never a half-built one.
+# Generation runs (gemini.py) only rewrite their CSV at the end, so the
+# journals they commit to can be watched too: each committed batch is
+# overlaid onto the map as soon as it lands.
+POLL_SECONDS = 2.0
+
+
+def _signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class ReloadingBeatIndex:
+    """Drop-in stand-in for BeatIndex that picks up CSV updates while playing.
+
+    Words added at runtime (``add``/``add_mask``) and words from the
+    ``journals`` are kept across reloads unless the new map already has them.
+    """
+
+    def __init__(self, csv_path, loader=load_index, poll_seconds=POLL_SECONDS, on_swap=None, journals=()):
+        self.csv_path = csv_path
+        self.journals = list(journals)
+        self.loader = loader
+        self.poll_seconds = poll_seconds
+        self.on_swap = on_swap
+        self.version = 0
+        self.loaded_at = None
+        self.load_seconds = None
+        self.last_error = None
+        self._extra = {}  # runtime additions: key -> names of the player words that beat it
+        self._lock = threading.Lock()  # serializes writers, never taken by lookups
+        self._stop = threading.Event()
+        self._thread = None
+        self._seen = _signature(csv_path)
+        self._seen_journals = self._journal_signatures()
+        self.journal_words = 0
+        self.index = self._load()
+        self.loaded_at = time.time()
+
+    def _journal_signatures(self):
+        return [_signature(path) for path in self.journals]
+
+    def _load(self):
+        started = time.perf_counter()
+        index = self.loader(self.csv_path)
+        index.mask_of("")  # map + index a .bmap now, not on the first lookup of a round
+        self.journal_words = 0
+        for path in self.journals:
+            if not os.path.exists(path):
+                continue
+            journal = BeatJournal(path, read_only=True)
+            for key, (word, mask) in journal.rows.items():
+                if key not in index:
+                    names = [n for i, n in enumerate(journal.columns) if mask >> i & 1 and n in index.bit_of]
+                    index.add_mask(word, index.mask_for(names))
+                    self.journal_words += 1
+        self.load_seconds = round(time.perf_counter() - started, 4)
+        return index
+
+    # === Reloading ===
+    def reload(self):
+        """Load the CSV (and journals) again and swap it in. Returns True if swapped."""
+        signature = _signature(self.csv_path)
+        journal_signatures = self._journal_signatures()
+        try:
+            index = self._load()
+        except Exception as e:  # keep serving the old map
+            self.last_error = f"{type(e).__name__}: {e}"
+            print(f"⚠️  Beat map reload failed, keeping version {self.version}: {self.last_error}")
+            return False
+        with self._lock:
+            for key, names in self._extra.items():
+                if key not in index:
+                    index.add_mask(key, index.mask_for(n for n in names if n in index.bit_of))
+            self.index = index
+            self.version += 1
+            self.loaded_at = time.time()
+            self._seen = signature
+            self._seen_journals = journal_signatures
+            self.last_error = None
+        print(f"🔄 Beat map v{self.version}: {len(index)} words in {self.load_seconds}s")
+        if self.on_swap:
+            self.on_swap(index)
+        return True
+
+    def check(self):
+        """Reload if the CSV changed and has stayed unchanged for one poll,
+        or right away if a journal grew (readers skip unfinished batches)."""
+        signature = _signature(self.csv_path)
+        if signature is None or signature == self._seen:
+            if self._journal_signatures() != self._seen_journals:
+                return self.reload()
+            return False
+        time.sleep(self.poll_seconds)  # let an in-progress write finish
+        if _signature(self.csv_path) != signature:
+            return False  # still being written; try again next poll
+        return self.reload()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            self.check()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="beat-map-reload", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def info(self):
+        return {
+            "path": self.csv_path,
+            "version": self.version,
+            "words": len(self.index),
+            "journals": self.journals,
+            "journal_words": self.journal_words,
+            "loaded_at": self.loaded_at,
+            "load_seconds": self.load_seconds,
+            "last_error": self.last_error,
+        }
+
+    # === BeatIndex API (each call reads self.index exactly once) ===
+    def add(self, word, bits):
+        with self._lock:
+            self.index.add(word, bits)
+            self._remember(word, self.index.mask_of(word))
+
+    def add_mask(self, word, mask):
+        with self._lock:
+            self.index.add_mask(word, mask)
+            self._remember(word, mask)
+
+    def _remember(self, word, mask):
+        names = self.index.bit_names
+        self._extra[normalize_key(word)] = [names[b] for b in range(len(names)) if mask >> b & 1]
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, word):
+        return word in self.index
+
+    def keys(self):
+        # A snapshot: runtime add()s may land while a caller iterates
+        with self._lock:
+            return list(self.index.keys())
+
+    def mask_of(self, word):
+        return self.index.mask_of(word)
+
+    def cheapest(self, word, allowed=None):
+        return self.index.cheapest(word, allowed)
+
+    def cheapest_many(self, words, allowed=None):
+        return self.index.cheapest_many(words, allowed)
+
+    def beaters(self, word, allowed=None):
+        return self.index.beaters(word, allowed)
+
+    def row_bits(self, word):
+        return self.index.row_bits(word)
+
+    def __getattr__(self, name):
+        # bit_names, allowed_mask, ... come from whichever map is current
+        if name == "index":
+            raise AttributeError(name)
+        return getattr(self.index, name)
+
@@ -0,0 +1,123 @@
+import os
+import time
+from functools import lru_cache
+
+from fastapi import Request
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+from beat_index import normalize_key, word_costs, word_ids
+from beat_reload import ReloadingBeatIndex
+from decision_table import load_fallback
+from fuzzy_index import FUZZY_THRESHOLD, FuzzyIndex
+from gemini import app
+from metrics import metrics
+
+# === Beat Lookup Service ===
+# Loads the beat map once and answers lookups for any number of bots:
+#   uvicorn beat_service:app --port 8001
+BEAT_MAP = os.environ.get("BEAT_MAP", "large_beat_map_binary2.csv")
+FALLBACK_WORD = os.environ.get("FALLBACK_WORD") or load_fallback(("Nuclear Bomb", 42))[0]
+FUZZY_THRESHOLD = float(os.environ.get("FUZZY_THRESHOLD", FUZZY_THRESHOLD))
+LRU_SIZE = int(os.environ.get("BEAT_LRU_SIZE", 4096))
+RELOAD_SECONDS = float(os.environ.get("BEAT_RELOAD_SECONDS", 2.0))
+# Generation journals overlaid as batches land; os.pathsep-separated, empty to disable
+BEAT_JOURNALS = [p for p in os.environ.get("BEAT_JOURNALS", "large_beat_map_binary.journal").split(os.pathsep) if p]
+
+
+def on_swap(index):
+    # Rebuild on the reload thread, then drop answers computed from the old map
+    global fuzzy_index
+    fuzzy_index = FuzzyIndex(index.keys())
+    lookup.cache_clear()
+
+
+beat_index = ReloadingBeatIndex(BEAT_MAP, poll_seconds=RELOAD_SECONDS, on_swap=on_swap,
+                                journals=BEAT_JOURNALS).start()
+fuzzy_index = FuzzyIndex(beat_index.keys())
+fallback = {"id": word_ids[FALLBACK_WORD], "word": FALLBACK_WORD, "cost": word_costs[FALLBACK_WORD]}
+
+# endpoint path -> list of request durations (seconds)
+latencies = {}
+MAX_SAMPLES = 10000
+
+
+def _as_dict(beater):
+    word_id, name, cost = beater
+    return {"id": word_id, "word": name, "cost": cost}
+
+
+@lru_cache(maxsize=LRU_SIZE)
+def lookup(key):
+    resolved, method, confidence = key, "exact", 1.0
+    if key not in beat_index:
+        match = fuzzy_index.resolve(key, FUZZY_THRESHOLD)
+        if match is None:
+            return {"word": key, "resolved": None, "best": fallback, "candidates": [],
+                    "miss_reason": "unknown_word", "fallback": True}
+        resolved, method, confidence = match.key, match.method, match.confidence
+
+    candidates = [_as_dict(b) for b in beat_index.beaters(resolved)]
+    result = {"word": key, "resolved": resolved, "method": method, "confidence": confidence,
+              "candidates": candidates, "miss_reason": None, "fallback": False}
+    if candidates:
+        result["best"] = candidates[0]
+    else:
+        result.update(best=fallback, miss_reason="no_allowed_beater", fallback=True)
+    return result
+
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    path = route.path if route else request.url.path
+    elapsed = time.perf_counter() - started
+    samples = latencies.setdefault(path, [])
+    samples.append(elapsed)
+    metrics.observe("http_request_seconds", elapsed, endpoint=path)
+    if len(samples) > MAX_SAMPLES:
+        del samples[:len(samples) - MAX_SAMPLES]
+    return response
+
+
+@app.get("/beats/stats")
+async def beats_stats():
+    endpoints = {}
+    for path, samples in latencies.items():
+        ordered = sorted(samples)
+        endpoints[path] = {
+            "count": len(ordered),
+            "mean_ms": round(1000 * sum(ordered) / len(ordered), 3),
+            "p50_ms": round(1000 * ordered[len(ordered) // 2], 3),
+            "p99_ms": round(1000 * ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))], 3),
+        }
+    info = lookup.cache_info()
+    return {
+        "words": len(beat_index),
+        "index": beat_index.info(),
+        "lru": {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max": info.maxsize},
+        "endpoints": endpoints,
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    # Empty unless WOP_METRICS=1
+    return metrics.prometheus()
+
+
+@app.get("/beats/{word}")
+async def beats_word(word: str):
+    return lookup(normalize_key(word))
+
+
+class BatchRequest(BaseModel):
+    words: list[str] = []
+
+
+@app.post("/beats/batch")
+async def beats_batch(payload: BatchRequest):
+    # Non-string words get a 422 from FastAPI, not a 500 from normalize_key
+    return {"results": [lookup(normalize_key(w)) for w in payload.words]}
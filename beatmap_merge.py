@@ -0,0 +1,183 @@
+import csv
+import os
+import sys
+from itertools import islice
+
+import numpy as np
+
+from beat_index import DEFAULT_COLUMNS, normalize_key, read_beat_csv
+
+# === Beat-Map Merge / Diff Tool ===
+#   python beatmap_merge.py union|intersect|majority out.csv a.csv b.csv [...]
+#   python beatmap_merge.py diff a.csv b.csv
+# Rows are held as one uint64 per word (bit i = column i), so a 100k-word map
+# is 800 KB and every merge is a handful of whole-array operations.
+CHUNK_ROWS = 65536
+
+
+class PackedMap:
+    """Beat map as parallel arrays: normalized keys and uint64 bit rows."""
+
+    def __init__(self, keys, masks, columns=DEFAULT_COLUMNS):
+        self.keys = keys
+        self.masks = masks
+        self.columns = list(columns)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def bools(self, rows=None):
+        """Unpack (a slice of) the rows into an (n, columns) bool matrix."""
+        masks = self.masks if rows is None else self.masks[rows]
+        raw = np.unpackbits(masks.astype("<u8").view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+        return raw[:, :len(self.columns)].astype(bool)
+
+
+def pack_bools(matrix):
+    packed = np.packbits(matrix, axis=1, bitorder="little")
+    padded = np.zeros((matrix.shape[0], 8), dtype=np.uint8)
+    padded[:, :packed.shape[1]] = packed
+    return padded.view("<u8").ravel()
+
+
+def _chunk_bools(bits, width):
+    try:
+        matrix = np.array(bits, dtype=bool)
+        if matrix.ndim == 2 and matrix.shape[1] == width:
+            return matrix
+    except ValueError:
+        pass  # ragged rows
+    matrix = np.zeros((len(bits), width), dtype=bool)
+    for i, row in enumerate(bits):
+        matrix[i, :min(width, len(row))] = row[:width]
+    return matrix
+
+
+def load_packed(path, columns=DEFAULT_COLUMNS, chunk_rows=CHUNK_ROWS):
+    """Stream a beat-map CSV into a PackedMap, chunk by chunk.
+
+    Columns are reordered/aligned to ``columns`` (missing ones read as 0) and
+    duplicate words keep their last row.
+    """
+    if len(columns) > 64:
+        raise ValueError("packed rows hold at most 64 columns")
+    file_columns, rows = read_beat_csv(path)
+    position = {name: i for i, name in enumerate(file_columns)}
+    width = len(file_columns)
+    take = np.array([position.get(name, width) for name in columns])  # width = all-zero spare
+    keys, parts = [], []
+    while True:
+        chunk = list(islice(rows, chunk_rows))
+        if not chunk:
+            break
+        words, bits = zip(*chunk)
+        keys.extend(normalize_key(w) for w in words)
+        matrix = np.zeros((len(chunk), width + 1), dtype=bool)
+        matrix[:, :width] = _chunk_bools(bits, width)
+        parts.append(pack_bools(matrix[:, take]))
+    masks = np.concatenate(parts) if parts else np.zeros(0, dtype="<u8")
+
+    last = {key: i for i, key in enumerate(keys)}  # insertion order of first sight, last index
+    if len(last) != len(keys):
+        masks = masks[np.fromiter(last.values(), dtype=np.int64, count=len(last))]
+    return PackedMap(list(last), masks, columns)
+
+
+def load_matrix(path, columns=DEFAULT_COLUMNS):
+    """(keys, bool matrix) view of a beat map, for callers that want plain arrays."""
+    packed = load_packed(path, columns)
+    return packed.keys, packed.bools()
+
+
+# === Alignment ===
+def align(maps):
+    """Union of keys, (k, n) stacked masks and (k, n) presence flags."""
+    keys = []
+    pos = {}
+    for m in maps:
+        for key in m.keys:
+            if key not in pos:
+                pos[key] = len(keys)
+                keys.append(key)
+    masks = np.zeros((len(maps), len(keys)), dtype="<u8")
+    present = np.zeros((len(maps), len(keys)), dtype=bool)
+    for i, m in enumerate(maps):
+        rows = np.fromiter((pos[k] for k in m.keys), dtype=np.int64, count=len(m))
+        masks[i, rows] = m.masks
+        present[i, rows] = True
+    return keys, masks, present
+
+
+def merge(maps, how="union"):
+    """Merge PackedMaps that share a column vocabulary.
+
+    union:     a column is set if any map that knows the word sets it
+    intersect: set only if every map that knows the word sets it
+    majority:  set if more than half the maps that know the word set it
+    """
+    columns = maps[0].columns
+    keys, masks, present = align(maps)
+    if how == "union":
+        merged = np.bitwise_or.reduce(masks, axis=0)
+    elif how == "intersect":
+        full = np.uint64((1 << len(columns)) - 1)
+        merged = np.bitwise_and.reduce(np.where(present, masks, full), axis=0)
+    elif how == "majority":
+        votes = np.zeros((len(keys), len(columns)), dtype=np.int32)
+        for i, m in enumerate(maps):
+            votes += PackedMap(keys, masks[i], columns).bools()
+        merged = pack_bools(2 * votes > present.sum(axis=0)[:, None])
+    else:
+        raise ValueError(f"unknown merge mode {how!r}")
+    return PackedMap(keys, merged, columns)
+
+
+def diff(a, b):
+    """Per-word and per-column differences from ``a`` to ``b``."""
+    keys, masks, present = align([a, b])
+    both = present[0] & present[1]
+    changed = both & (masks[0] != masks[1])
+    rows = np.flatnonzero(changed)
+    old = PackedMap(keys, masks[0], a.columns).bools(rows)
+    new = PackedMap(keys, masks[1], a.columns).bools(rows)
+    added = (new & ~old).sum(axis=0)
+    removed = (old & ~new).sum(axis=0)
+    return {
+        "only_in_a": [keys[i] for i in np.flatnonzero(present[0] & ~present[1])],
+        "only_in_b": [keys[i] for i in np.flatnonzero(present[1] & ~present[0])],
+        "changed": [keys[i] for i in rows],
+        "columns": {name: (int(added[j]), int(removed[j]))
+                    for j, name in enumerate(a.columns) if added[j] or removed[j]},
+    }
+
+
+def write_csv(packed, path, chunk_rows=CHUNK_ROWS):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["word"] + packed.columns)
+        for start in range(0, len(packed), chunk_rows):
+            stop = min(start + chunk_rows, len(packed))
+            bits = packed.bools(slice(start, stop)).astype(np.uint8).tolist()
+            writer.writerows([key] + row for key, row in zip(packed.keys[start:stop], bits))
+    os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4:
+        print("usage: beatmap_merge.py union|intersect|majority out.csv in.csv ... | diff a.csv b.csv")
+        sys.exit(1)
+    mode = sys.argv[1]
+    if mode == "diff":
+        a, b = (load_packed(p) for p in sys.argv[2:4])
+        result = diff(a, b)
+        print(f"🆚 {sys.argv[2]} ({len(a)} words) vs {sys.argv[3]} ({len(b)} words)")
+        print(f"   only in first: {len(result['only_in_a'])} | only in second: {len(result['only_in_b'])} "
+              f"| changed rows: {len(result['changed'])}")
+        for name, (added, removed) in sorted(result["columns"].items(), key=lambda kv: -sum(kv[1])):
+            print(f"   {name:<24} +{added} -{removed}")
+    else:
+        out_path, inputs = sys.argv[2], sys.argv[3:]
+        merged = merge([load_packed(p) for p in inputs], mode)
+        write_csv(merged, out_path)
+        print(f"✅ {mode} of {len(inputs)} maps -> {out_path} ({len(merged)} words)")
@@ -0,0 +1,202 @@
+import argparse
+import asyncio
+import contextlib
+import csv
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+
+from beat_index import BeatIndex, word_costs
+from beat_prompts import build_batch_prompt, clean_and_filter_json, extract_json_text, your_words
+from beatmap_bin import MappedBeatIndex, compile_csv
+from gen_pipeline import FakeModel, generate_batches
+
+# === Offline Benchmark Harness ===
+# python bench.py --out bench_results/today.json [--compare bench_results/before.json]
+# Every number is the median of --repeat runs, so two result files can be compared.
+DATASETS = ["large_beat_map_binary2.csv", "old_db.csv"]
+SYNTHETIC_SIZES = [100_000]
+
+
+def timeit(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def quiet(fn):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn()
+
+
+def make_synthetic_csv(path, size, seed=0):
+    rng = random.Random(seed)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["word"] + your_words)
+        for i in range(size):
+            writer.writerow([f"synthword{i}"] + [1 if rng.random() < 0.08 else 0 for _ in your_words])
+    return path
+
+
+# === Legacy baseline (what player.py did before the bitset index) ===
+def legacy_load(path):
+    import pandas as pd
+    df = pd.read_csv(path)
+    beat_map = {row["word"].lower(): row[1:].tolist() for _, row in df.iterrows()}
+    return beat_map, df.columns[1:].tolist()
+
+
+def legacy_what_beats(beat_map, word_list, system_word):
+    binary = beat_map.get(system_word.lower())
+    if binary is None:
+        return None
+    candidates = [
+        (i + 1, word_list[i], word_costs[word_list[i]])
+        for i, beat in enumerate(binary)
+        if beat == 1 and word_list[i] not in ["Supermassive Black Hole", "Entropy"]
+    ]
+    return min(candidates, key=lambda x: x[2]) if candidates else None
+
+
+# === Benchmarks ===
+def bench_dataset(path, repeat, queries=20000, legacy=True):
+    out = {"path": os.path.basename(path), "bytes": os.path.getsize(path)}
+    index = BeatIndex.from_csv(path)
+    out["words"] = len(index)
+    keys = list(index.keys())
+    rng = random.Random(1)
+    # 90% hits, 10% misses, like a real game with partial coverage
+    words = [rng.choice(keys) if rng.random() < 0.9 else f"missing{i}" for i in range(queries)]
+
+    out["load_csv_s"] = timeit(lambda: BeatIndex.from_csv(path), repeat)
+    with tempfile.TemporaryDirectory() as tmp:
+        bin_path = os.path.join(tmp, "map.bmap")
+        out["compile_s"] = timeit(lambda: compile_csv(path, bin_path), repeat)
+        out["load_bmap_first_lookup_s"] = timeit(lambda: MappedBeatIndex(bin_path).cheapest(keys[0]), repeat)
+        mapped = MappedBeatIndex(bin_path)
+        out["lookup_bmap_ns"] = 1e9 * timeit(lambda: [mapped.cheapest(w) for w in words], repeat) / queries
+        mapped.close()
+
+    out["lookup_bitset_ns"] = 1e9 * timeit(lambda: [index.cheapest(w) for w in words], repeat) / queries
+    out["lookup_batch_ns"] = 1e9 * timeit(lambda: index.cheapest_many(words), repeat) / queries
+
+    if legacy:
+        try:
+            out["legacy_load_s"] = timeit(lambda: legacy_load(path), max(1, repeat // 2))
+            beat_map, word_list = legacy_load(path)
+            out["legacy_lookup_ns"] = 1e9 * timeit(
+                lambda: [legacy_what_beats(beat_map, word_list, w) for w in words], repeat) / queries
+        except ImportError:
+            out["legacy"] = "pandas not installed"
+    return out
+
+
+def bench_parser(repeat, batches=200):
+    model = FakeModel()
+    texts = []
+    nouns = [l.strip() for l in open("nounlist.txt") if l.strip()]
+    for i in range(batches):
+        batch = nouns[i * 20:(i + 1) * 20]
+        texts.append(model.generate_content(build_batch_prompt(batch)).text)
+    failures = 0
+
+    def run():
+        nonlocal failures
+        failures = 0
+        for text in texts:
+            try:
+                clean_and_filter_json(extract_json_text(text), your_words)
+            except ValueError:
+                failures += 1
+
+    seconds = timeit(run, repeat)
+    return {"responses": batches, "rows_per_s": batches * 20 / seconds, "parse_failures": failures}
+
+
+def bench_pipeline(latency=0.02, batches=50, concurrency=8):
+    nouns = [l.strip() for l in open("nounlist.txt") if l.strip()]
+    work = [nouns[i * 20:(i + 1) * 20] for i in range(batches)]
+    stats = quiet(lambda: asyncio.run(generate_batches(
+        FakeModel(latency=latency), work, lambda b, r: None, concurrency=concurrency, backoff=0.001)))
+    return {"model_latency_s": latency, "concurrency": concurrency, "batches": batches,
+            "seconds": stats["seconds"], "ok": stats["ok"], "failed": stats["failed"]}
+
+
+def bench_rounds(rounds=10, round_seconds=0.3, port=8766):
+    from multi_player import serve_stub
+    from round_engine import RoundEngine
+
+    server, thread = serve_stub(port, round_seconds)
+    index = BeatIndex.from_csv("large_beat_map_binary2.csv")
+    choose = lambda word: (index.cheapest(word) or (42,))[0]
+    engine = RoundEngine(f"http://127.0.0.1:{port}")
+    try:
+        engine.session.post(engine.get_url.replace("/get-word", "/reset"))
+        engine.play("bench", choose, rounds)
+        summary = engine.latency_summary()
+    finally:
+        engine.close()
+        server.should_exit = True
+        thread.join()
+    return summary
+
+
+def compare(new, old, path=""):
+    """Print new/old ratios for every numeric leaf present in both results."""
+    for key, value in new.items():
+        where = f"{path}.{key}" if path else key
+        if isinstance(value, dict) and isinstance(old.get(key), dict):
+            compare(value, old[key], where)
+        elif isinstance(value, (int, float)) and isinstance(old.get(key), (int, float)) and old[key]:
+            print(f"{where:60s} {old[key]:>14.4g} -> {value:>14.4g}  x{value / old[key]:.2f}")
+
+
+def run(args):
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": args.repeat,
+        "datasets": {},
+    }
+    for path in DATASETS:
+        results["datasets"][path] = bench_dataset(path, args.repeat, legacy=not args.no_legacy)
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.synthetic:
+            path = make_synthetic_csv(os.path.join(tmp, f"synthetic_{size}.csv"), size)
+            results["datasets"][f"synthetic_{size}"] = bench_dataset(path, args.repeat, legacy=not args.no_legacy)
+    results["parser"] = bench_parser(args.repeat)
+    results["pipeline"] = bench_pipeline()
+    if not args.no_server:
+        results["rounds"] = quiet(bench_rounds)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark beat-map loading, lookup and rounds")
+    parser.add_argument("--out", default=None, help="where to write the JSON results")
+    parser.add_argument("--compare", default=None, help="earlier results file to compare against")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--synthetic", type=int, nargs="*", default=SYNTHETIC_SIZES)
+    parser.add_argument("--no-legacy", action="store_true", help="skip the pandas baseline")
+    parser.add_argument("--no-server", action="store_true", help="skip the end-to-end round benchmark")
+    args = parser.parse_args()
+
+    results = run(args)
+    out = args.out or os.path.join("bench_results", time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results written to {out}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
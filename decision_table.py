@@ -0,0 +1,126 @@
+import csv
+import json
+import os
+import sys
+import time
+
+from beat_index import BANNED_WORDS, DEFAULT_COLUMNS, normalize_key, word_costs, word_ids
+
+# === Expected-Cost Decision Table ===
+# A round costs the word's price, plus 30 if the server says it didn't win.
+# For every system word we estimate P(win) per player word and keep the
+# argmin of  cost + 30 * (1 - P(win)).
+LOSS_PENALTY = 30
+SOURCES = ["old_db.csv", "large_beat_map_binary2.csv"]
+OUTCOMES = "outcomes.jsonl"
+TABLE = "decision_table.csv"
+FALLBACK_FILE = "fallback.json"  # best blind pick, written by beat_coverage.py
+
+# Prior P(win) by how many source maps mark the pair as a beat
+PRIOR_BY_VOTES = {"all": 0.9, "some": 0.6, "none": 0.05}
+# Pseudo-count: how many logged rounds the prior is worth
+PRIOR_STRENGTH = 4.0
+
+
+def load_outcomes(path):
+    """Yield (system word, word_id, success) from the JSONL round log."""
+    if not os.path.exists(path):
+        return
+    with open(path) as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+                yield normalize_key(rec["word"]), int(rec["word_id"]), bool(rec["success"])
+            except (ValueError, KeyError):
+                continue  # torn or foreign line
+
+
+def build_table(sources=SOURCES, outcomes=OUTCOMES, columns=DEFAULT_COLUMNS):
+    """Return (keys, best column per key, expected cost, P(win) of the pick)."""
+    # Imported here so players that only load_table() don't pay for numpy
+    import numpy as np
+    from beatmap_merge import load_matrix
+
+    keys = []
+    key_pos = {}
+    maps = [load_matrix(path, columns) for path in sources if os.path.exists(path)]
+    for map_keys, _ in maps:
+        for key in map_keys:
+            if key not in key_pos:
+                key_pos[key] = len(keys)
+                keys.append(key)
+
+    n, m = len(keys), len(columns)
+    votes = np.zeros((n, m), dtype=np.int16)
+    present = np.zeros((n, 1), dtype=np.int16)  # how many sources know the word
+    for map_keys, matrix in maps:
+        rows = np.fromiter((key_pos[k] for k in map_keys), dtype=np.int64, count=len(map_keys))
+        votes[rows] += matrix
+        present[rows] += 1
+
+    prior = np.where(votes == 0, PRIOR_BY_VOTES["none"],
+                     np.where(votes >= present, PRIOR_BY_VOTES["all"], PRIOR_BY_VOTES["some"]))
+
+    # Beta-binomial update with the logged server verdicts
+    wins = np.zeros((n, m))
+    plays = np.zeros((n, m))
+    col_of_id = {word_ids[name]: j for j, name in enumerate(columns)}
+    logged = [(key_pos[w], col_of_id[i], s) for w, i, s in load_outcomes(outcomes)
+              if w in key_pos and i in col_of_id]
+    if logged:
+        r, c, s = (np.array(x) for x in zip(*logged))
+        np.add.at(plays, (r, c), 1)
+        np.add.at(wins, (r, c), s.astype(float))
+    p_win = (prior * PRIOR_STRENGTH + wins) / (PRIOR_STRENGTH + plays)
+
+    costs = np.array([word_costs[name] for name in columns], dtype=float)
+    expected = costs + LOSS_PENALTY * (1 - p_win)
+    expected[:, [j for j, name in enumerate(columns) if name in BANNED_WORDS]] = np.inf
+    best = expected.argmin(axis=1)
+    rows = np.arange(n)
+    return keys, best, expected[rows, best], p_win[rows, best]
+
+
+def write_table(path=TABLE, columns=DEFAULT_COLUMNS, **kwargs):
+    keys, best, expected, p_win = build_table(columns=columns, **kwargs)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["word", "word_id", "player_word", "expected_cost", "win_prob"])
+        for key, j, e, p in zip(keys, best.tolist(), expected.tolist(), p_win.tolist()):
+            name = columns[j]
+            writer.writerow([key, word_ids[name], name, round(e, 3), round(p, 4)])
+    os.replace(tmp_path, path)
+    return len(keys)
+
+
+def load_table(path=TABLE):
+    """word -> (word_id, expected_cost) for O(1) lookups in the player."""
+    table = {}
+    if not os.path.exists(path):
+        return table
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for word, word_id, _, expected, _ in reader:
+            table[word] = (int(word_id), float(expected))
+    return table
+
+
+def load_fallback(default, path=FALLBACK_FILE):
+    """(word, word_id) of the precomputed fallback, or ``default`` if not built yet."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        if word_ids.get(data["word"]) == data["word_id"]:
+            return data["word"], data["word_id"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return default
+
+
+if __name__ == "__main__":
+    # Usage: python decision_table.py [out.csv]  (rebuild between games)
+    started = time.perf_counter()
+    count = write_table(sys.argv[1] if len(sys.argv) > 1 else TABLE)
+    print(f"✅ Decision table for {count} words in {time.perf_counter() - started:.2f}s")
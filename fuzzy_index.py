@@ -0,0 +1,144 @@
+import re
+from collections import Counter, namedtuple
+from itertools import chain
+
+# How sure each resolution method is; fuzzy matches scale FUZZY by similarity
+CONFIDENCE = {"exact": 1.0, "normalized": 0.98, "stem": 0.92, "fuzzy": 0.85}
+# Below this a near-miss isn't trusted and callers play their fallback word.
+# Above every "fuzzy" confidence on purpose: on nounlist words missing from
+# the map, edit-distance matches were almost all different words
+# (resolution -> revolution, gastronomy -> astronomy), so by default only
+# exact, spelling and plural matches are used.
+FUZZY_THRESHOLD = 0.9
+
+Match = namedtuple("Match", "key confidence method")
+
+_NON_WORD = re.compile(r"[^a-z0-9']+")
+# British -> American spellings, applied to keys and queries alike
+_SPELLING = [
+    (re.compile(r"isation\b"), "ization"),
+    (re.compile(r"is(e|ed|es|ing)\b"), r"iz\1"),
+    (re.compile(r"ys(e|ed|es|ing)\b"), r"yz\1"),
+    (re.compile(r"our\b"), "or"),
+    (re.compile(r"tre\b"), "ter"),
+]
+
+
+def normalize(word):
+    word = _NON_WORD.sub(" ", word.lower().replace("'s ", " ")).strip()
+    for pattern, repl in _SPELLING:
+        word = pattern.sub(repl, word)
+    return word
+
+
+def stem(word):
+    """Strip plurals only. System words are nouns, and -ing/-ed/-ly/-ization
+    endings on nouns make different words ("early" is not "ear", "meaning"
+    is not "means", "organization" is not "organ")."""
+    words = word.split(" ")
+    w = words[-1]
+    if len(w) > 4 and w.endswith("ies"):
+        w = w[:-3] + "y"
+    elif len(w) > 4 and w.endswith(("sses", "ches", "shes", "xes", "zes")):
+        w = w[:-2]
+    elif len(w) > 3 and w.endswith("s") and not w.endswith(("ss", "us", "is", "ics")):
+        w = w[:-1]
+    words[-1] = w
+    return " ".join(words)
+
+
+def trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance, or limit + 1 once it is certain to exceed ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        best = i
+        for j, cb in enumerate(b, 1):
+            d = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            cur.append(d)
+            if d < best:
+                best = d
+        if best > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+# === Fallback Index ===
+class FuzzyIndex:
+    """Resolves unknown system words to the nearest beat-map key.
+
+    Tries, in order: exact key, normalized spelling, shared stem, then edit
+    distance over candidates drawn from a trigram index of stems (same
+    first letter only; typos rarely hit it). Every answer carries a
+    deterministic confidence in [0, 1].
+    """
+
+    def __init__(self, keys, max_distance=1, max_candidates=16):
+        self.max_distance = max_distance
+        self.max_candidates = max_candidates
+        self.keys = set()
+        self.by_normal = {}
+        self.by_stem = {}
+        self.stems = []
+        self.postings = {}
+        for key in sorted(keys):
+            self.keys.add(key)
+            n = normalize(key)
+            self.by_normal.setdefault(n, key)
+            s = normalize(stem(n))  # again after stemming: "colours" -> "colour" -> "color"
+            if s not in self.by_stem:
+                self.by_stem[s] = key
+                sid = len(self.stems)
+                self.stems.append(s)
+                for gram in trigrams(s):
+                    self.postings.setdefault(gram, []).append(sid)
+
+    def resolve(self, word, threshold=0.0):
+        """Return the best Match for ``word``, or None if nothing clears ``threshold``."""
+        match = self._resolve(word)
+        if match is None or match.confidence < threshold:
+            return None
+        return match
+
+    def _resolve(self, word):
+        key = word.strip().lower()
+        if key in self.keys:
+            return Match(key, CONFIDENCE["exact"], "exact")
+        n = normalize(word)
+        if n in self.by_normal:
+            return Match(self.by_normal[n], CONFIDENCE["normalized"], "normalized")
+        s = normalize(stem(n))
+        if s in self.by_stem:
+            return Match(self.by_stem[s], CONFIDENCE["stem"], "stem")
+        return self._nearest(s)
+
+    def _nearest(self, s):
+        postings = self.postings
+        counts = Counter(chain.from_iterable(postings[g] for g in sorted(trigrams(s)) if g in postings))
+        if not counts:
+            return None
+        limit = self.max_distance
+        best = None
+        # Most shared trigrams first; most_common keeps first-seen order on ties,
+        # and both grams and postings are walked in sorted order, so results are stable
+        for sid, _ in counts.most_common(self.max_candidates):
+            cand = self.stems[sid]
+            if abs(len(cand) - len(s)) > limit or cand[:1] != s[:1]:
+                continue
+            d = edit_distance(s, cand, limit)
+            if d <= limit and (best is None or (d, cand) < best):
+                best = (d, cand)
+                limit = d
+        if best is None:
+            return None
+        d, cand = best
+        similarity = 1 - d / max(len(s), len(cand))
+        return Match(self.by_stem[cand], round(CONFIDENCE["fuzzy"] * similarity, 4), "fuzzy")
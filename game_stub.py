@@ -0,0 +1,116 @@
+import os
+import random
+import time
+
+from fastapi import Body
+
+from beat_index import word_costs
+from beatmap_bin import load_index
+from gemini import app
+
+# === Local Stub Game Server ===
+# Implements /get-word, /submit-word and /status on gemini.py's FastAPI app
+# so players can be load-tested without the real server:
+#   uvicorn game_stub:app --port 8000
+BEAT_MAP = os.environ.get("BEAT_MAP", "large_beat_map_binary2.csv")
+ROUND_SECONDS = float(os.environ.get("STUB_ROUND_SECONDS", 2.0))
+WORD_ID_NAMES = list(word_costs)  # WORD_ID_NAMES[id - 1] is the word with that ID
+
+
+def load_system_words(paths=("freq-words.csv", "nounlist.txt")):
+    words = []
+    seen = set()
+    for path in paths:
+        with open(path, "r") as f:
+            for line in f:
+                word = line.strip().split(",")[0]
+                if word and word.lower() not in seen:
+                    seen.add(word.lower())
+                    words.append(word)
+    return words
+
+
+class StubGame:
+    """Round clock plus scoring against a beat map.
+
+    The round number is derived from the time since ``start()``, so there
+    is no background task: round r runs from (r - 1) * round_seconds.
+    """
+
+    def __init__(self, index, words, round_seconds=ROUND_SECONDS, seed=0):
+        self.index = index
+        self.words = words
+        self.round_seconds = round_seconds
+        self.seed = seed
+        self.start()
+
+    def start(self):
+        self.started_at = time.monotonic()
+        self.rng = random.Random(self.seed)
+        self.round_words = {}
+        self.submissions = {}  # round -> {player_id: (word_id, success, cost)}
+
+    def current_round(self):
+        return int((time.monotonic() - self.started_at) / self.round_seconds) + 1
+
+    def word_for(self, round_id):
+        if round_id not in self.round_words:
+            # Drawn in round order so a seed always gives the same game
+            for r in range(len(self.round_words) + 1, round_id + 1):
+                self.round_words[r] = self.rng.choice(self.words)
+        return self.round_words[round_id]
+
+    def beats(self, system_word, word_id):
+        mask = self.index.mask_of(system_word)
+        name = WORD_ID_NAMES[word_id - 1]
+        return mask is not None and name in self.index.bit_of and bool(mask >> self.index.bit_of[name] & 1)
+
+    def submit(self, player_id, word_id, round_id):
+        if round_id != self.current_round():
+            return {"success": False, "error": f"round {round_id} is not open"}
+        if not 1 <= word_id <= len(WORD_ID_NAMES):
+            return {"success": False, "error": f"unknown word_id {word_id}"}
+        round_subs = self.submissions.setdefault(round_id, {})
+        if player_id in round_subs:
+            return {"success": False, "error": "already submitted this round"}
+        success = self.beats(self.word_for(round_id), word_id)
+        cost = word_costs[WORD_ID_NAMES[word_id - 1]] + (0 if success else 30)
+        round_subs[player_id] = (word_id, success, cost)
+        return {"success": success, "cost": cost}
+
+    def status(self):
+        round_id = self.current_round() - 1
+        subs = self.submissions.get(round_id, {})
+        return {
+            "round": round_id,
+            "word": self.round_words.get(round_id),
+            "players": len(subs),
+            "wins": sum(1 for _, success, _ in subs.values() if success),
+        }
+
+
+game = StubGame(load_index(BEAT_MAP), load_system_words())
+
+
+# Handlers are async so they all run on the event loop thread and never race on `game`
+@app.get("/get-word")
+async def get_word():
+    round_id = game.current_round()
+    return {"word": game.word_for(round_id), "round": round_id}
+
+
+@app.post("/submit-word")
+async def submit_word(payload: dict = Body(...)):
+    return game.submit(payload["player_id"], int(payload["word_id"]), int(payload["round_id"]))
+
+
+@app.get("/status")
+async def status():
+    return game.status()
+
+
+@app.post("/reset")
+async def reset():
+    # Restart the round clock at round 1 (the load driver calls this)
+    game.start()
+    return {"round": game.current_round()}
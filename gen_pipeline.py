@@ -0,0 +1,384 @@
+import asyncio
+import json
+import random
+import time
+import zlib
+
+from beat_prompts import (BeatStreamParser, batch_rows, build_batch_prompt, clean_and_filter_json,
+                          extract_json_text, your_words)
+from metrics import metrics
+from miss_queue import backoff_delay
+
+CHARS_PER_TOKEN = 4  # rough English average, for responses without usage metadata
+STREAM_CHUNK_CHARS = 64  # FakeModel's streamed chunk size
+
+
+# === Rate Limiting ===
+class TokenBucket:
+    """Async token bucket for requests-per-minute quotas."""
+
+    def __init__(self, rate_per_minute, burst=None, clock=time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1, rate_per_minute // 60)
+        self.tokens = float(self.capacity)
+        self.clock = clock
+        self.updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# === Fake Model (offline testing) ===
+def prompt_targets(prompt):
+    """Recover the target words from a prompt built by build_batch_prompt()."""
+    section = prompt.split("Target words:", 1)[1].split("Player words:", 1)[0]
+    return [line[2:].strip() for line in section.splitlines() if line.startswith("- ")]
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeStream:
+    """Async iterable of response chunks, like ``generate_content_async(stream=True)``."""
+
+    def __init__(self, chunks, delay=0.0):
+        self.chunks = chunks
+        self.delay = delay
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield chunk
+
+
+def split_chunks(text, size=STREAM_CHUNK_CHARS):
+    return [FakeResponse(text[i:i + size]) for i in range(0, len(text), size)] or [FakeResponse("")]
+
+
+class FakeModel:
+    """Stand-in for genai.GenerativeModel that returns canned JSON.
+
+    ``responses`` may map a target word to its beaters or be a callable
+    taking the prompt and returning raw text. Words not covered get a
+    deterministic pseudo-random pick so results are reproducible.
+    ``fail_rate`` makes that fraction of calls raise, to exercise retries.
+    ``stream=True`` returns the text in STREAM_CHUNK_CHARS pieces, with
+    ``latency`` spread across them.
+    """
+
+    def __init__(self, responses=None, latency=0.0, fail_rate=0.0, seed=0):
+        self.responses = responses or {}
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    def _beaters(self, word):
+        if word in self.responses:
+            return self.responses[word]
+        h = zlib.crc32(word.lower().encode("utf-8"))
+        return [w for i, w in enumerate(your_words) if (h >> (i % 29)) & 1 and (h + i) % 5 == 0]
+
+    def _respond(self, prompt):
+        self.calls += 1
+        if self.fail_rate and self.rng.random() < self.fail_rate:
+            raise RuntimeError("fake model: simulated API error")
+        if callable(self.responses):
+            return FakeResponse(self.responses(prompt))
+        body = json.dumps({w: self._beaters(w) for w in prompt_targets(prompt)}, indent=2)
+        return FakeResponse(f"```json\n{body}\n```")
+
+    def generate_content(self, prompt, stream=False):
+        if stream:
+            return self._stream(prompt)
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(prompt)
+
+    def _stream(self, prompt):
+        chunks = split_chunks(self._respond(prompt).text)
+        for chunk in chunks:
+            if self.latency:
+                time.sleep(self.latency / len(chunks))
+            yield chunk
+
+    async def generate_content_async(self, prompt, stream=False):
+        if stream:
+            chunks = split_chunks(self._respond(prompt).text)
+            return FakeStream(chunks, self.latency / len(chunks))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(prompt)
+
+
+async def request_model(model, prompt):
+    """Send ``prompt`` and return the raw response (text + usage metadata)."""
+    if hasattr(model, "generate_content_async"):
+        return await model.generate_content_async(prompt)
+    return await asyncio.to_thread(model.generate_content, prompt)
+
+
+async def stream_model(model, prompt):
+    """Yield response chunks as they arrive; the last one carries usage metadata."""
+    if hasattr(model, "generate_content_async"):
+        async for chunk in await model.generate_content_async(prompt, stream=True):
+            yield chunk
+    else:
+        # Sync-only model: no incremental text, one chunk at the end
+        yield await asyncio.to_thread(model.generate_content, prompt)
+
+
+# === Output ===
+class OrderedWriter:
+    """Hands batches to ``sink`` in submission order, whatever order they finish in.
+
+    Failed batches (rows=None) are skipped but still advance the cursor.
+    """
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.next_index = 0
+        self.pending = {}
+
+    def done(self, index, batch, rows):
+        self.pending[index] = (batch, rows)
+        while self.next_index in self.pending:
+            batch, rows = self.pending.pop(self.next_index)
+            if rows is not None:
+                self.sink(batch, rows)
+            self.next_index += 1
+
+    def flush(self):
+        # After an abort: write whatever finished, in order, despite the gaps
+        for index in sorted(self.pending):
+            batch, rows = self.pending.pop(index)
+            if rows is not None:
+                self.sink(batch, rows)
+
+
+# === Batch Sizing ===
+class BatchSizer:
+    """Chooses the next batch size from how recent batches went.
+
+    Grows by ``step`` while full-size batches parse and come back within
+    ``target_seconds``, halves on an unparseable response, and never asks
+    for more words than fit in ``max_output_tokens`` at the observed
+    tokens per word. Call it to get the current size.
+    """
+
+    def __init__(self, start=20, min_size=5, max_size=60, step=5, target_seconds=30.0,
+                 max_output_tokens=8192):
+        self.size = start
+        self.min_size = min_size
+        self.max_size = max_size
+        self.step = step
+        self.target_seconds = target_seconds
+        self.max_output_tokens = max_output_tokens
+        self.tokens_per_word = None  # moving average of output tokens per target word
+
+    def __call__(self):
+        return self.size
+
+    def record(self, words, seconds, output_tokens, ok):
+        if not ok:
+            self.size = max(self.min_size, self.size // 2)
+            return
+        per_word = output_tokens / max(1, words)
+        self.tokens_per_word = per_word if self.tokens_per_word is None else (
+            0.8 * self.tokens_per_word + 0.2 * per_word)
+        fits = int(0.8 * self.max_output_tokens / max(1.0, self.tokens_per_word))
+        if seconds > self.target_seconds:
+            self.size = max(self.min_size, self.size * 3 // 4)
+        elif words >= self.size:  # only full batches are evidence a bigger one works
+            self.size = min(self.max_size, self.size + self.step)
+        self.size = max(self.min_size, min(self.size, fits))
+
+
+def token_usage(response, prompt, text):
+    """(prompt tokens, output tokens, estimated?) for one model call."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None and getattr(usage, "prompt_token_count", None):
+        return usage.prompt_token_count, usage.candidates_token_count or 0, False
+    # Cached and fake responses carry no usage: ~4 characters per token
+    return len(prompt) // CHARS_PER_TOKEN, len(text) // CHARS_PER_TOKEN, True
+
+
+# === Pipeline ===
+async def generate_batches(model, batches, sink, concurrency=8, rpm=None, max_retries=3,
+                           backoff=1.0, max_failures=5, build_prompt=build_batch_prompt,
+                           parse=clean_and_filter_json, sizer=None, bisect=True, stream=False):
+    """Run ``batches`` through ``model`` with at most ``concurrency`` requests in flight.
+
+    ``batches`` may be any iterable; it is consumed lazily, one batch per
+    free worker, so a generator (e.g. GenerationScheduler.batches with a
+    BatchSizer) can react to results already written. API errors are
+    retried up to ``max_retries`` times with jittered backoff. An
+    unparseable response is split in half instead of being retried, down to
+    single words, so one bad word costs only itself (at most 2n - 1 calls
+    for n words); target words missing from an otherwise good answer are
+    retried on their own. Sub-batches share the ``concurrency`` limit. With
+    ``stream=True`` responses are read chunk by chunk through
+    BeatStreamParser (``parse`` is then unused), so a response that breaks
+    off still yields the entries completed before it did. More than
+    ``max_failures`` consecutive failed batches (including batches whose
+    words were all dropped) stops the run. Returns a
+    stats dict.
+    """
+    bucket = TokenBucket(rpm) if rpm else None
+    slots = asyncio.Semaphore(max(1, concurrency))  # model calls in flight, bisected halves included
+    writer = OrderedWriter(sink)
+    pending = enumerate(batches)
+
+    stats = {"batches": 0, "ok": 0, "failed": 0, "retries": 0, "rows": 0, "aborted": False,
+             "bisections": 0, "dropped": 0, "calls": 0, "prompt_tokens": 0, "output_tokens": 0,
+             "tokens_estimated": False, "partial": 0}
+    state = {"consecutive_failures": 0}
+    first_rows = []  # seconds from request to first complete entry, per streamed call
+    started = time.perf_counter()
+
+    async def ask(batch, prompt, sent):
+        """One model call -> (results, last response, text, parse error). Raises on API errors."""
+        if not stream:
+            response = await request_model(model, prompt)
+            try:
+                return parse(extract_json_text(response.text), your_words), response, response.text, None
+            except Exception as e:
+                return {}, response, response.text, e
+        parser = BeatStreamParser(batch)
+        parts, last = [], None
+        try:
+            async for chunk in stream_model(model, prompt):
+                last = chunk
+                parts.append(chunk.text)
+                if parser.feed(chunk.text) and len(parser.results) == 1:
+                    first_rows.append(time.perf_counter() - sent)
+        except Exception as e:
+            if not parser.results:
+                raise
+            print(f"⚠️  Stream broke off after {len(parser.results)}/{len(batch)} words: {e}")
+        parser.close()
+        error = None if parser.results or parser.finished else ValueError("no complete entries in response")
+        return parser.results, last, "".join(parts), error
+
+    async def run_batch(batch):
+        prompt = build_prompt(batch)
+        for attempt in range(max_retries + 1):
+            try:
+                async with slots:
+                    if bucket:
+                        await bucket.acquire()
+                    sent = time.perf_counter()
+                    results, response, text, error = await ask(batch, prompt, sent)
+            except Exception as e:
+                metrics.inc("gemini_errors_total")
+                if attempt == max_retries:
+                    print(f"❌ Gemini batch failed after {attempt + 1} attempts: {batch}\nError: {e}")
+                    return None
+                stats["retries"] += 1
+                await asyncio.sleep(backoff_delay(attempt, backoff))
+                continue
+
+            seconds = time.perf_counter() - sent
+            prompt_tokens, output_tokens, estimated = token_usage(response, prompt, text)
+            stats["calls"] += 1
+            stats["prompt_tokens"] += prompt_tokens
+            stats["output_tokens"] += output_tokens
+            stats["tokens_estimated"] |= estimated
+            rows = batch_rows(batch, results)
+            if metrics.enabled:
+                metrics.observe("gemini_call_seconds", seconds)
+                metrics.inc("gemini_tokens_total", prompt_tokens, kind="prompt")
+                metrics.inc("gemini_tokens_total", output_tokens, kind="output")
+                metrics.event("gemini_call", words=len(batch), answered=len(rows), seconds=round(seconds, 4),
+                              prompt_tokens=prompt_tokens, output_tokens=output_tokens)
+            if not rows:
+                metrics.inc("gemini_parse_failures_total")
+                error = error or ValueError("no target word answered")
+                # Don't let a caching wrapper hand back the same bad answer
+                if hasattr(model, "forget"):
+                    model.forget(prompt)
+                if sizer:
+                    sizer.record(len(batch), seconds, output_tokens, ok=False)
+                if bisect and len(batch) > 1:
+                    # Splitting replaces retrying: the halves are the retry
+                    stats["bisections"] += 1
+                    mid = len(batch) // 2
+                    print(f"✂️  Unparseable response for {len(batch)} words ({error}); "
+                          f"retrying as {mid} + {len(batch) - mid}")
+                    halves = await asyncio.gather(run_batch(batch[:mid]), run_batch(batch[mid:]))
+                    if all(half is None for half in halves):
+                        return None
+                    return [row for half in halves if half for row in half]
+                if bisect:
+                    print(f"❌ Dropping {batch}: response unparseable ({error})")
+                    stats["dropped"] += len(batch)
+                    return []
+                if attempt == max_retries:
+                    print(f"❌ Gemini batch failed after {attempt + 1} attempts: {batch}\nError: {error}")
+                    return None
+                stats["retries"] += 1
+                await asyncio.sleep(backoff_delay(attempt, backoff))
+                continue
+
+            answered = {row[0] for row in rows}
+            missing = [word for word in batch if word not in answered]
+            if sizer:
+                # A partial answer often means the response hit its length limit
+                sizer.record(len(batch), seconds, output_tokens, ok=not missing)
+            if missing:
+                stats["partial"] += 1
+                print(f"🩹 Kept {len(rows)}/{len(batch)} words; retrying the {len(missing)} unanswered")
+                rows += await run_batch(missing) or []
+            return rows
+
+    async def worker():
+        while not stats["aborted"]:
+            try:
+                index, batch = next(pending)
+            except StopIteration:
+                return
+            stats["batches"] += 1
+            print(f"\n🔹 Sending batch {index + 1} ({len(batch)} words): {batch}")
+            rows = await run_batch(batch)
+            if not rows:  # API errors, or every word dropped as unparseable
+                rows = None
+                stats["failed"] += 1
+                state["consecutive_failures"] += 1
+                if state["consecutive_failures"] > max_failures:
+                    print("❌ Too many consecutive failures. Stopping.")
+                    stats["aborted"] = True
+            else:
+                stats["ok"] += 1
+                stats["rows"] += len(rows)
+                if metrics.enabled:
+                    metrics.inc("gemini_rows_total", len(rows))
+                    metrics.set("gemini_rows_per_second", stats["rows"] / (time.perf_counter() - started))
+                state["consecutive_failures"] = 0
+                print(f"✅ Mapped batch {index + 1} ({len(rows)} words)")
+            writer.done(index, batch, rows)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    writer.flush()
+    stats["seconds"] = time.perf_counter() - started
+    stats["words_per_s"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+    spent = stats["prompt_tokens"] + stats["output_tokens"]
+    stats["tokens_per_word"] = spent / stats["rows"] if stats["rows"] else None
+    stats["first_row_s"] = sum(first_rows) / len(first_rows) if first_rows else None
+    if sizer:
+        stats["batch_size"] = sizer.size
+    return stats
@@ -0,0 +1,151 @@
+import heapq
+import math
+import os
+
+from beat_index import normalize_key
+from fuzzy_index import normalize, stem
+from miss_queue import MISS_LOG, MissQueue
+
+# === Generation Scheduler ===
+# Decides which words the next Gemini batch asks about. Each pending word is
+# scored by how likely it is to come up in a game:
+#   frequency rank in freq-words.csv  +  server misses seen by the players,
+# scaled down when a near-duplicate (plural, British spelling, ...) is
+# already covered. Scores live in a heap that is updated as results arrive.
+NOUNS = "nounlist.txt"
+FREQ_WORDS = "freq-words.csv"
+FREQ_WEIGHT = 1.0  # most common word scores 1.0, the least common ~0
+MISS_WEIGHT = 2.0  # per log(1 + misses): one observed miss outranks any frequency
+NEAR_DUP_FACTOR = 0.25  # a covered near-duplicate already answers most rounds
+
+
+def read_words(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [line.strip().split(",")[0] for line in f if line.strip()]
+
+
+def near_key(word):
+    # Normalize again after stemming: "colours" -> "colour" -> "color"
+    return normalize(stem(normalize(word)))
+
+
+class GenerationScheduler:
+    """Priority queue of words still to generate, best score first.
+
+    Ties (e.g. all the words with no signal) keep their input order.
+    """
+
+    def __init__(self, words, covered=(), freq_words=(), miss_counts=None):
+        self.freq_rank = {}
+        for rank, word in enumerate(freq_words):
+            self.freq_rank.setdefault(normalize_key(word), rank)
+        self.freq_size = max(1, len(self.freq_rank))
+        self.misses = dict(miss_counts or {})
+        self.covered = set(covered)
+        self.covered_near = {near_key(k) for k in self.covered}
+
+        self.order = {}  # word -> position in the input, for stable ties
+        self.scores = {}  # word -> current score, only for pending words
+        self.by_near = {}  # near key -> pending words sharing it
+        self.heap = []
+        for word in [*words, *freq_words, *self.misses]:
+            self.add(word)
+
+    @classmethod
+    def from_files(cls, covered=(), nouns=NOUNS, freq_words=FREQ_WORDS, misses=MISS_LOG):
+        counts = MissQueue(misses).counts if os.path.exists(misses) else {}
+        return cls(read_words(nouns), covered, read_words(freq_words), counts)
+
+    def score(self, word):
+        score = 0.0
+        rank = self.freq_rank.get(word)
+        if rank is not None:
+            score += FREQ_WEIGHT * (1 - rank / self.freq_size)
+        if self.misses.get(word):
+            score += MISS_WEIGHT * math.log1p(self.misses[word])
+        if near_key(word) in self.covered_near:
+            score *= NEAR_DUP_FACTOR
+        return score
+
+    def _push(self, word):
+        score = self.score(word)
+        self.scores[word] = score
+        heapq.heappush(self.heap, (-score, self.order[word], word))
+
+    def add(self, word):
+        word = normalize_key(word)
+        if not word or word in self.covered or word in self.scores:
+            return
+        self.order.setdefault(word, len(self.order))
+        self.by_near.setdefault(near_key(word), set()).add(word)
+        self._push(word)
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __contains__(self, word):
+        return normalize_key(word) in self.scores
+
+    # === Popping ===
+    def next_batch(self, n):
+        """Pop the ``n`` best pending words."""
+        batch = []
+        while self.heap and len(batch) < n:
+            neg_score, _, word = heapq.heappop(self.heap)
+            if self.scores.get(word) != -neg_score:
+                continue  # stale entry from an earlier score
+            del self.scores[word]
+            self.by_near[near_key(word)].discard(word)
+            batch.append(word)
+        return batch
+
+    def batches(self, n, budget=None):
+        """Yield batches lazily, so each one sees every update made so far.
+
+        ``n`` may be a callable (e.g. gen_pipeline.BatchSizer) asked for the
+        size of every batch.
+        """
+        sent = 0
+        while budget is None or sent < budget:
+            batch = self.next_batch(n() if callable(n) else n)
+            if not batch:
+                return
+            sent += 1
+            yield batch
+
+    # === Updates ===
+    def mark_covered(self, words):
+        """Results arrived: demote pending near-duplicates of ``words``."""
+        for word in words:
+            key = normalize_key(word)
+            self.covered.add(key)
+            if self.scores.pop(key, None) is not None:
+                self.by_near[near_key(key)].discard(key)  # its heap entry is now stale
+            near = near_key(key)
+            if near in self.covered_near:
+                continue
+            self.covered_near.add(near)
+            for other in self.by_near.get(near, ()):
+                self._push(other)
+
+    def observe_miss(self, word, count=1):
+        key = normalize_key(word)
+        if key in self.covered:
+            return
+        self.misses[key] = self.misses.get(key, 0) + count
+        if key in self.scores:
+            self._push(key)
+        else:
+            self.add(key)
+
+    def sink(self, inner):
+        """Wrap a gen_pipeline sink so finished batches update the schedule."""
+
+        def record(batch, rows):
+            inner(batch, rows)
+            if rows is not None:
+                self.mark_covered(row[0] for row in rows)
+
+        return record
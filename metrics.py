@@ -0,0 +1,238 @@
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# === Metrics & Tracing ===
+# Counters, gauges and latency histograms for the player and the generator,
+# exported as JSONL snapshots and Prometheus text. Off unless WOP_METRICS=1:
+# every call then returns after one attribute check.
+#   WOP_METRICS=1                      turn it on
+#   WOP_METRICS_FILE=metrics.jsonl     where snapshots + trace events go
+#   WOP_METRICS_PORT=9100              serve /metrics from this process
+#   WOP_METRICS_FLUSH_SECONDS=10       how often the JSONL file is written
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COST_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 30, 35, 40, 45, 50, 60)
+BUCKETS = {"round_cost": COST_BUCKETS}  # everything else is a latency in seconds
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "labels", "started")
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+def _series(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+
+def _label_text(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Metrics:
+    def __init__(self, enabled=False, path=None, flush_seconds=10.0, prefix="wop_"):
+        self.enabled = enabled
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self.prefix = prefix
+        self.started = time.time()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self._events = []
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    @classmethod
+    def from_env(cls):
+        metrics = cls(
+            enabled=os.environ.get("WOP_METRICS", "0") not in ("", "0"),
+            path=os.environ.get("WOP_METRICS_FILE", "metrics.jsonl"),
+            flush_seconds=float(os.environ.get("WOP_METRICS_FLUSH_SECONDS", 10)),
+        )
+        if metrics.enabled:
+            metrics.start()
+            if os.environ.get("WOP_METRICS_PORT"):
+                metrics.serve(int(os.environ["WOP_METRICS_PORT"]))
+        return metrics
+
+    # === Recording ===
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = _series(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        if not self.enabled:
+            return
+        self.gauges[_series(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = _series(name, labels)
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram(BUCKETS.get(name, LATENCY_BUCKETS))
+            hist.observe(value)
+
+    def timer(self, name, **labels):
+        """``with metrics.timer("x_seconds"): ...`` observes the block's duration."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def event(self, kind, **fields):
+        """Trace one thing that happened (a round, a model call) to the JSONL file."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._events.append({"t": round(time.time(), 4), "event": kind, **fields})
+
+    # === Export ===
+    def snapshot(self):
+        with self._lock:
+            counters = {f"{n}{_label_text(l)}": v for (n, l), v in self.counters.items()}
+            gauges = {f"{n}{_label_text(l)}": v for (n, l), v in self.gauges.items()}
+            histograms = {
+                f"{n}{_label_text(l)}": {
+                    "count": h.count, "sum": round(h.sum, 6),
+                    "p50": h.quantile(0.5), "p90": h.quantile(0.9), "p99": h.quantile(0.99),
+                }
+                for (n, l), h in self.histograms.items()
+            }
+        return {"t": round(time.time(), 3), "uptime_s": round(time.time() - self.started, 3),
+                "counters": counters, "gauges": gauges, "histograms": histograms}
+
+    def prometheus(self):
+        lines = []
+        with self._lock:
+            for kind, series in (("counter", self.counters), ("gauge", self.gauges)):
+                typed = set()
+                for (name, labels), value in sorted(series.items()):
+                    full = self.prefix + name
+                    if full not in typed:
+                        lines.append(f"# TYPE {full} {kind}")
+                        typed.add(full)
+                    lines.append(f"{full}{_label_text(labels)} {value}")
+            typed = set()
+            for (name, labels), hist in sorted(self.histograms.items()):
+                full = self.prefix + name
+                if full not in typed:
+                    lines.append(f"# TYPE {full} histogram")
+                    typed.add(full)
+                cumulative = 0
+                for bound, n in zip((*hist.bounds, "+Inf"), hist.counts):
+                    cumulative += n
+                    lines.append(f"{full}_bucket{_label_text(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{full}_sum{_label_text(labels)} {hist.sum}")
+                lines.append(f"{full}_count{_label_text(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def flush(self):
+        """Append buffered events and a snapshot to ``path``."""
+        if not self.enabled or not self.path:
+            return
+        with self._lock:
+            events, self._events = self._events, []
+        with open(self.path, "a") as f:
+            for entry in events:
+                f.write(json.dumps(entry) + "\n")
+            f.write(json.dumps({"event": "snapshot", **self.snapshot()}) + "\n")
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            self.flush()
+
+    def start(self):
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+            self._flusher.start()
+            atexit.register(self.flush)
+        return self
+
+    def serve(self, port, host="0.0.0.0"):
+        """Serve Prometheus text on ``http://host:port/metrics`` from a daemon thread."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                found = self.path.split("?")[0] == "/metrics"
+                body = metrics.prometheus().encode() if found else b"not found\n"
+                self.send_response(200 if found else 404)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"📈 Metrics on http://{host}:{port}/metrics")
+        return server
+
+
+# Shared by every module in the process
+metrics = Metrics.from_env()
@@ -0,0 +1,236 @@
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import Counter
+
+from beat_index import normalize_key, read_beat_csv
+from beat_prompts import BeatStreamParser, batch_rows, build_batch_prompt
+
+# === Miss Queue + Background Enrichment ===
+# The player pushes every system word its beat map doesn't know. A worker
+# thread coalesces them into prompt batches, asks the model, and adds the
+# answers to the live index, so a repeated word is covered next time.
+MISS_LOG = "misses.jsonl"
+ENRICHED_CSV = "enriched_beat_map.csv"  # rows the worker generated, reloaded at startup
+BATCH_SIZE = 20
+COALESCE_SECONDS = 2.0  # how long to wait for more misses before sending a short batch
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    # "Full jitter": spreads retries so workers don't stampede the API together
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class MissQueue:
+    """Persistent, deduplicated queue of unknown system words.
+
+    ``push`` only enqueues in memory (no I/O on the round loop); the worker
+    thread appends ``{"miss": word}`` / ``{"done": [...]}`` lines to ``path``
+    as it drains, so pending words and miss counts survive a restart.
+    """
+
+    def __init__(self, path=MISS_LOG):
+        self.path = path
+        self.counts = Counter()  # how often the server sent each unknown word
+        self.pending = {}  # insertion-ordered set of words still to enrich
+        self.done = set()
+        self._inbox = queue.Queue()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn last line
+                if "miss" in entry:
+                    key = entry["miss"]
+                    self.counts[key] += 1
+                    if key not in self.done:
+                        self.pending[key] = None
+                for key in entry.get("done", []):
+                    self.done.add(key)
+                    self.pending.pop(key, None)
+
+    def _append(self, entries):
+        with open(self.path, "a") as f:
+            f.writelines(json.dumps(e) + "\n" for e in entries)
+
+    def push(self, word):
+        self._inbox.put_nowait(normalize_key(word))
+
+    def drain(self, timeout=None):
+        """Move pushed words into ``pending``; waits up to ``timeout`` for the first."""
+        keys = []
+        try:
+            keys.append(self._inbox.get(timeout=timeout) if timeout else self._inbox.get_nowait())
+            while True:
+                keys.append(self._inbox.get_nowait())
+        except queue.Empty:
+            pass
+        if keys:
+            self._append({"miss": key, "t": round(time.time(), 3)} for key in keys)
+            for key in keys:
+                self.counts[key] += 1
+                if key not in self.done:
+                    self.pending[key] = None
+        return len(keys)
+
+    def take(self, n, known=()):
+        """Pop up to ``n`` pending words, retiring any that ``known`` already covers."""
+        batch, covered = [], []
+        for key in list(self.pending):
+            if len(batch) == n:
+                break
+            del self.pending[key]
+            (covered if key in known else batch).append(key)
+        if covered:
+            self.mark_done(covered)
+        return batch
+
+    def requeue(self, words):
+        for key in words:
+            self.pending[key] = None
+
+    def mark_done(self, words):
+        self._append([{"done": list(words)}])
+        self.done.update(words)
+
+    def __len__(self):
+        return len(self.pending) + self._inbox.qsize()
+
+
+class EnrichmentWorker:
+    """Drains a MissQueue in batches and feeds model answers into ``index``.
+
+    ``model`` is anything with ``generate_content(prompt, stream=True)``
+    yielding chunks with ``.text`` (a Gemini model, CachedModel or
+    gen_pipeline.FakeModel); with ``model=None`` the
+    worker only persists misses. ``load_model()`` is called on the worker
+    thread to create the model, so a slow import never runs on the caller's.
+    ``sink(batch, rows)`` optionally saves the new CSV rows (e.g.
+    beat_index.CsvSink); reload them with ``load_enriched`` next time, as
+    the words are marked done in the miss log.
+    """
+
+    def __init__(self, index, model, misses, sink=None, batch_size=BATCH_SIZE,
+                 coalesce_seconds=COALESCE_SECONDS, max_retries=3, backoff=1.0, load_model=None):
+        self.index = index
+        self.model = model
+        self.load_model = load_model
+        self.misses = misses
+        self.sink = sink
+        self.batch_size = batch_size
+        self.coalesce_seconds = coalesce_seconds
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.stats = {"batches": 0, "words": 0, "failed": 0, "retries": 0}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _add(self, word, beaters):
+        self.index.add_mask(word, self.index.mask_for(n for n in beaters if n in self.index.bit_of))
+
+    def enrich(self, batch):
+        """Stream answers for ``batch`` into the index, each word as soon as it
+        is complete. Returns the number of words added."""
+        prompt = build_batch_prompt(batch)
+        results = {}
+        for attempt in range(self.max_retries + 1):
+            parser = BeatStreamParser([w for w in batch if w not in results])
+            try:
+                for chunk in self.model.generate_content(prompt, stream=True):
+                    for word, beaters in parser.feed(chunk.text):
+                        self._add(word, beaters)
+                for word, beaters in parser.close():
+                    self._add(word, beaters)
+                results.update(parser.results)
+                if results:
+                    break
+                raise ValueError("no complete entries in response")
+            except Exception as e:
+                results.update(parser.results)  # keep what arrived before the error
+                if hasattr(self.model, "forget"):
+                    self.model.forget(prompt)  # don't serve a bad cached answer again
+                if attempt == self.max_retries:
+                    if results:
+                        break
+                    print(f"❌ Enrichment gave up on {batch}: {e}")
+                    self.stats["failed"] += 1
+                    self.misses.requeue(batch)
+                    self._stop.wait(backoff_delay(attempt + 1, self.backoff))  # cool down before the retry
+                    return 0
+                self.stats["retries"] += 1
+                self._stop.wait(backoff_delay(attempt, self.backoff))
+
+        rows = batch_rows(batch, results)
+        if self.sink and rows:
+            self.sink(batch, rows)
+        # Words the model skipped are retired too; if they keep coming, counts show it
+        self.misses.mark_done(batch)
+        self.stats["batches"] += 1
+        self.stats["words"] += len(rows)
+        print(f"🧩 Enriched {len(rows)}/{len(batch)} missed words: {', '.join(r[0] for r in rows)}")
+        return len(rows)
+
+    def run_once(self, timeout=None):
+        """Wait for misses, coalesce for up to ``coalesce_seconds``, enrich one batch."""
+        self.misses.drain(timeout)
+        if self.model is None:
+            return 0  # record-only: misses are persisted for a later generation run
+        deadline = time.monotonic() + self.coalesce_seconds
+        while self.misses.pending and len(self.misses.pending) < self.batch_size and not self._stop.is_set():
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            self.misses.drain(left)
+        batch = self.misses.take(self.batch_size, known=self.index)
+        return self.enrich(batch) if batch else 0
+
+    def _run(self):
+        if self.model is None and self.load_model is not None:
+            try:
+                self.model = self.load_model()
+            except Exception as e:
+                print(f"⚠️  Enrichment model unavailable ({e}); only recording misses")
+        while not self._stop.is_set():
+            try:
+                self.run_once(timeout=0.5)
+            except Exception as e:  # never take the player down
+                print(f"⚠️  Enrichment worker error: {e}")
+                self._stop.wait(1.0)
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="miss-enrichment", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        # A model call can't be interrupted; after ``timeout`` the daemon thread is left to die with the process
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def load_enriched(index, path=ENRICHED_CSV):
+    """Add rows enriched in earlier games to ``index``; returns how many were new."""
+    if not os.path.exists(path):
+        return 0
+    columns, rows = read_beat_csv(path)
+    added = 0
+    for word, bits in rows:
+        if normalize_key(word) in index:
+            continue
+        names = [name for name, flag in zip(columns, bits) if flag and name in index.bit_of]
+        index.add_mask(word, index.mask_for(names))
+        added += 1
+    return added
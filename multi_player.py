@@ -0,0 +1,128 @@
+import argparse
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+
+from beat_index import word_costs
+from beatmap_bin import load_index
+from decision_table import load_fallback
+from fuzzy_index import FUZZY_THRESHOLD, FuzzyIndex
+from round_engine import AdaptivePoller
+
+# === Asyncio Multi-Player Load Driver ===
+# Runs many players concurrently off one shared, read-only beat-map index.
+# Without --url it starts the local stub server (game_stub.py) in-process.
+FALLBACK_WORD_ID = load_fallback(("Nuclear Bomb", 42))[1]  # fallback.json, from beat_coverage.py
+WORD_ID_NAMES = list(word_costs)
+
+
+def make_chooser(index, fuzzy=None, fallback_id=FALLBACK_WORD_ID, threshold=FUZZY_THRESHOLD):
+    """what_beats() without the printing: system word -> word ID."""
+
+    def choose(system_word):
+        best = index.cheapest(system_word)
+        if best is None and system_word not in index and fuzzy is not None:
+            match = fuzzy.resolve(system_word, threshold)
+            if match is not None:
+                best = index.cheapest(match.key)
+        return best[0] if best else fallback_id
+
+    return choose
+
+
+async def play_player(client, player_id, choose, num_rounds, results):
+    poller = AdaptivePoller()
+    round_id = 1
+    while round_id <= num_rounds:
+        data = (await client.get("/get-word")).json()
+        now = time.perf_counter()
+        if data["round"] < round_id:
+            await asyncio.sleep(poller.next_delay(now))
+            continue
+        if data["round"] > round_id:
+            # Fell behind: the rounds we slept through are lost
+            results["missed_rounds"] += data["round"] - round_id
+            round_id = data["round"]
+            if round_id > num_rounds:
+                break
+        poller.round_changed(now)
+        word_id = choose(data["word"])
+        payload = {"player_id": player_id, "word_id": word_id, "round_id": round_id}
+        result = (await client.post("/submit-word", json=payload)).json()
+        results["latencies"].append(time.perf_counter() - now)
+        results["rounds"] += 1
+        results["wins"] += bool(result.get("success"))
+        results["cost"] += word_costs[WORD_ID_NAMES[word_id - 1]] + (0 if result.get("success") else 30)
+        if "error" in result:
+            results["errors"] += 1
+        round_id += 1
+
+
+async def run_players(base_url, num_players, num_rounds, choose, transport=None, reset=False):
+    # reset=True only against our own game_stub: /reset would restart a shared server's game
+    results = {"rounds": 0, "wins": 0, "cost": 0, "errors": 0, "missed_rounds": 0, "latencies": []}
+    limits = httpx.Limits(max_connections=num_players, max_keepalive_connections=num_players)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0, transport=transport) as client:
+        if reset:
+            await client.post("/reset")
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            play_player(client, f"load-{i}", choose, num_rounds, results) for i in range(num_players)
+        ))
+        results["seconds"] = time.perf_counter() - started
+    return summarize(results, num_players)
+
+
+def summarize(results, num_players):
+    lat = sorted(results.pop("latencies"))
+    pick = lambda q: round(1000 * lat[min(len(lat) - 1, int(q * len(lat)))], 2) if lat else None
+    return {
+        "players": num_players,
+        **results,
+        "seconds": round(results["seconds"], 2),
+        "win_rate": round(results["wins"] / results["rounds"], 4) if results["rounds"] else None,
+        "avg_cost_per_round": round(results["cost"] / results["rounds"], 2) if results["rounds"] else None,
+        "latency_ms": {"p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99), "max": pick(1.0)},
+    }
+
+
+def serve_stub(port, round_seconds):
+    """Start game_stub's app with uvicorn on a background thread."""
+    import uvicorn
+    import game_stub
+
+    game_stub.game.round_seconds = round_seconds
+    server = uvicorn.Server(uvicorn.Config(game_stub.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test players against a game server")
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--round-seconds", type=float, default=1.0)
+    parser.add_argument("--beat-map", default="large_beat_map_binary2.csv")
+    parser.add_argument("--url", help="existing server to target instead of the local stub")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    index = load_index(args.beat_map)
+    choose = make_chooser(index, FuzzyIndex(index.keys()))
+    server = None
+    if not args.url:
+        server, thread = serve_stub(args.port, args.round_seconds)
+        args.url = f"http://127.0.0.1:{args.port}"
+
+    summary = asyncio.run(run_players(args.url, args.players, args.rounds, choose, reset=server is not None))
+    print(json.dumps(summary, indent=2))
+
+    if server:
+        server.should_exit = True
+        thread.join()
@@ -1,59 +1,110 @@
-import requests
-import pandas as pd
-from time import sleep
+import os
+import threading
+
+from dotenv import load_dotenv
+
+from beat_index import CsvSink, word_costs
+from beat_reload import ReloadingBeatIndex
+from decision_table import load_fallback, load_table
+from fuzzy_index import FUZZY_THRESHOLD, FuzzyIndex
+from metrics import metrics
+from miss_queue import EnrichmentWorker, MissQueue, load_enriched
+from round_engine import RoundEngine
 
 # === Configuration ===
 host = "http://172.18.4.158:8000/"
-post_url = f"{host}/submit-word"
-get_url = f"{host}/get-word"
-status_url = f"{host}/status"
 NUM_ROUNDS = 5
-FALLBACK_WORD = "Pebble"
-FALLBACK_WORD_ID = 3  # Pebble's ID
-
-# === Word Cost Reference (from hackathon docs) ===
-word_costs = {
-    "Feather": 1, "Coal": 1, "Pebble": 1, "Leaf": 2, "Paper": 2, "Rock": 2,
-    "Water": 3, "Twig": 3, "Sword": 4, "Shield": 4, "Gun": 5, "Flame": 5,
-    "Rope": 5, "Disease": 6, "Cure": 6, "Bacteria": 6, "Shadow": 7, "Light": 7,
-    "Virus": 7, "Sound": 8, "Time": 8, "Fate": 8, "Earthquake": 9, "Storm": 9,
-    "Vaccine": 9, "Logic": 10, "Gravity": 10, "Robots": 10, "Stone": 11,
-    "Echo": 11, "Thunder": 12, "Karma": 12, "Wind": 13, "Ice": 13,
-    "Sandstorm": 13, "Laser": 14, "Magma": 14, "Peace": 14, "Explosion": 15,
-    "War": 15, "Enlightenment": 15, "Nuclear Bomb": 16, "Volcano": 16,
-    "Whale": 17, "Earth": 17, "Moon": 17, "Star": 18, "Tsunami": 18,
-    "Supernova": 19, "Antimatter": 19, "Plague": 20, "Rebirth": 20,
-    "Tectonic Shift": 21, "Gamma-Ray Burst": 22, "Human Spirit": 23,
-    "Apocalyptic Meteor": 24, "Earth's Core": 25, "Neutron Star": 26,
-    "Supermassive Black Hole": 35, "Entropy": 45
-}
-
-# === Load Beat Map from CSV ===
-df = pd.read_csv("large_beat_map_binary2.csv")
-beat_map = {
-    row["word"].lower(): row[1:].tolist()
-    for _, row in df.iterrows()
-}
-word_list = df.columns[1:].tolist()
+OUTCOME_LOG = "outcomes.jsonl"  # server verdicts, fed back into decision_table.py
+MISS_LOG = "misses.jsonl"  # unknown system words, kept across runs
+ENRICHED_CSV = "enriched_beat_map.csv"  # rows generated for them mid-game (merge with beatmap_merge.py)
+ENRICH_MISSES = True  # ask Gemini about misses in the background (needs GEMINI_API_KEY)
+RELOAD_SECONDS = 2.0  # how often to check the beat-map CSV for new coverage
+GENERATION_JOURNAL = "large_beat_map_binary.journal"  # gemini.py commits batches here mid-run
+# The blind pick with the lowest expected cost (python beat_coverage.py writes it); Pebble (ID 3) until then
+FALLBACK_WORD, FALLBACK_WORD_ID = load_fallback(("Pebble", 3))
+
+# === Load Beat Map (compiled .bmap, rebuilt from the CSV when stale) ===
+# Built on a background thread at startup (~80 ms), so no round pays for it
+fuzzy_index = None
+fuzzy_ready = threading.Event()
+
+def refresh_fuzzy(index):
+    # Runs off the round loop: at startup and on the reload thread after a swap
+    global fuzzy_index
+    fuzzy_index = FuzzyIndex(index.keys())
+    fuzzy_ready.set()
+
+# Reloaded in the background whenever the CSV changes or generation commits a batch
+beat_index = ReloadingBeatIndex("large_beat_map_binary2.csv", poll_seconds=RELOAD_SECONDS,
+                                on_swap=refresh_fuzzy, journals=[GENERATION_JOURNAL]).start()
+word_list = list(word_costs)  # word_list[id - 1] is the word with that ID
+
+# Expected-cost picks (python decision_table.py); empty if not built yet
+decision_table = load_table("decision_table.csv")
+
+# === Miss Enrichment (background thread, never blocks a round) ===
+misses = MissQueue(MISS_LOG)
+
+def load_gemini():
+    # Runs on the enrichment thread: importing Gemini takes about a second
+    try:
+        from gemini import cached_model
+    except ImportError as e:
+        print(f"⚠️  Gemini unavailable ({e})")
+        return None
+    return cached_model
+
+def start_enrichment():
+    # Words enriched in earlier games are done in the miss log, so load them back
+    added = load_enriched(beat_index, ENRICHED_CSV)
+    if added:
+        print(f"🧩 Loaded {added} enriched words from {ENRICHED_CSV}")
+    load_dotenv()
+    use_gemini = ENRICH_MISSES and bool(os.environ.get("GEMINI_API_KEY"))
+    if not use_gemini:
+        print(f"📮 Misses are only recorded in {MISS_LOG}")
+    return EnrichmentWorker(beat_index, None, misses, sink=CsvSink(ENRICHED_CSV),
+                            load_model=load_gemini if use_gemini else None).start()
+
+# Gemini is imported on the worker thread, so startup and round 1 don't wait for it
+enrichment = start_enrichment()
+# After start_enrichment so the words enriched in earlier games are included
+threading.Thread(target=refresh_fuzzy, args=(beat_index,), name="fuzzy-index", daemon=True).start()
+
+def resolve_unknown(system_word):
+    # Only blocks for a miss in the first ~100 ms after startup
+    if not fuzzy_ready.wait(timeout=1.0):
+        return None
+    return fuzzy_index.resolve(system_word, FUZZY_THRESHOLD)
 
 # === Word Selection Logic ===
 def what_beats(system_word):
     system_word = system_word.lower()
     print(f"\n🔍 Looking for word to beat: '{system_word}'")
 
-    if system_word not in beat_map:
-        print(f"⚠️  '{system_word}' not found in beat map. Using fallback: {FALLBACK_WORD}")
-        return FALLBACK_WORD_ID
-
-    binary = beat_map[system_word]
-
-    candidates = [
-        (i + 1, word_list[i], word_costs[word_list[i]])
-        for i, beat in enumerate(binary)
-        if beat == 1 and word_list[i] not in ["Supermassive Black Hole", "Entropy"]
-    ]
+    if system_word not in beat_index:
+        misses.push(system_word)  # enriched in the background for next time
+        match = resolve_unknown(system_word)
+        metrics.inc("lookups_total", result="miss" if match is None else "fuzzy")
+        if match is None:
+            metrics.inc("fallbacks_total", reason="unknown_word")
+            print(f"⚠️  '{system_word}' not found in beat map. Using fallback: {FALLBACK_WORD}")
+            return FALLBACK_WORD_ID
+        print(f"🔎 '{system_word}' not in beat map, closest is '{match.key}' ({match.method}, confidence {match.confidence})")
+        system_word = match.key
+    else:
+        metrics.inc("lookups_total", result="hit")
+
+    if system_word in decision_table:
+        word_id, expected = decision_table[system_word]
+        print(f"🧮 Decision table: {word_list[word_id - 1]} (ID {word_id}) has the lowest expected cost, ${expected}")
+        return word_id
+
+    # Already sorted cheapest first
+    candidates = beat_index.beaters(system_word)
 
     if not candidates:
+        metrics.inc("fallbacks_total", reason="no_beater")
         print(f"⚠️  No known beaters for '{system_word}'. Using fallback: {FALLBACK_WORD}")
         return FALLBACK_WORD_ID
 
@@ -61,43 +112,49 @@ def what_beats(system_word):
     for i, word, cost in candidates:
         print(f"   - {word} (ID {i}, cost ${cost})")
 
-    best = min(candidates, key=lambda x: x[2])
+    best = candidates[0]
     print(f"🏆 Choosing: {best[1]} (ID {best[0]}, cost ${best[2]})")
     return best[0]
 
 # === Main Game Function ===
+def show_status(future):
+    try:
+        print("📊 Last round status:", future.result())
+    except Exception as e:
+        print("📊 Last round status unavailable:", e)
+
 def play_game(player_id):
+    engine = RoundEngine(host, outcome_log=OUTCOME_LOG)
     total_cost = 0
 
-    for round_id in range(1, NUM_ROUNDS + 1):
-        print(f"\n🎲 === ROUND {round_id} ===")
-        round_num = -1
-        while round_num != round_id:
-            response = requests.get(get_url)
-            data = response.json()
-            sys_word = data['word']
-            round_num = data['round']
-            sleep(1)
-
-        if round_id > 1:
-            status = requests.get(status_url)
-            print("📊 Last round status:", status.json())
-
-        chosen_word_id = what_beats(sys_word)
-        payload = {"player_id": player_id, "word_id": chosen_word_id, "round_id": round_id}
-        response = requests.post(post_url, json=payload)
-        result = response.json()
-        print("📬 Submitted:", payload)
-        print("📣 Server response:", result)
-
-        # Track cost
-        chosen_word = word_list[chosen_word_id - 1]
-        word_cost = word_costs[chosen_word]
-        round_total = word_cost + (30 if not result.get("success", False) else 0)
-        total_cost += round_total
-        print(f"💸 Round cost: ${round_total} | Total so far: ${total_cost}")
-
+    try:
+        for round_id in range(1, NUM_ROUNDS + 1):
+            print(f"\n🎲 === ROUND {round_id} ===")
+            record = engine.play_round(player_id, round_id, what_beats)
+            if record["status"]:
+                record["status"].add_done_callback(show_status)
+
+            chosen_word_id = record["word_id"]
+            result = record["result"]
+            print("📬 Submitted:", record["payload"])
+            print("📣 Server response:", result)
+            print(f"⏱️  Detect-to-submit: {record['latency_ms']} ms")
+
+            # Track cost
+            chosen_word = word_list[chosen_word_id - 1]
+            word_cost = word_costs[chosen_word]
+            round_total = word_cost + (30 if not result.get("success", False) else 0)
+            total_cost += round_total
+            print(f"💸 Round cost: ${round_total} | Total so far: ${total_cost}")
+    finally:
+        engine.close()
+        enrichment.stop()
+        misses.drain()  # persist misses from the last round
     print(f"\n🏁 Game complete! Final total cost: ${total_cost}")
+    info = beat_index.info()
+    print(f"🗺️  Beat map v{info['version']}: {info['words']} words, loaded in {info['load_seconds']}s")
+    print(f"🧩 Enrichment: {enrichment.stats}, {len(misses)} words still pending")
+    print("⏱️  Latency:", engine.latency_summary())
 
 # === Run the Game ===
 play_game("rUk5kAbAYf")  # Replace with your real player ID
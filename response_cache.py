@@ -0,0 +1,248 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from beat_prompts import batch_rows, clean_and_filter_json, extract_json_text, match_key, your_words
+from gen_pipeline import FakeResponse, FakeStream, prompt_targets, request_model
+
+DEFAULT_CACHE_DIR = ".gemini_cache"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+
+
+def cache_key(model_name, prompt, settings=None):
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    blob = json.dumps({"model": model_name, "prompt": prompt_hash, "settings": settings or {}},
+                      sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+# === On-Disk Cache ===
+class ResponseCache:
+    """Content-addressed store of raw model responses.
+
+    One JSON file per response under ``<dir>/<key[:2]>/<key>.json``. Reads
+    bump the file's mtime, so evicting the oldest mtimes first is LRU.
+    Entries older than ``max_age`` seconds are dropped on read and on
+    eviction; the cache is trimmed back under ``max_bytes`` after writes.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._size = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def _expired(self, entry, now=None):
+        return self.max_age is not None and (now or time.time()) - entry["created"] > self.max_age
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if self._expired(entry):
+            self._remove(path)
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return entry
+
+    def put(self, key, text, model_name, settings=None, targets=None):
+        entry = {
+            "model": model_name,
+            "settings": settings or {},
+            "targets": targets or [],
+            "text": text,
+            "created": time.time(),
+        }
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Own temp file per writer: gemini.py and every player's enrichment
+        # worker share the cache and may store the same key at once
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                        dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.chmod(tmp_path, 0o644)  # mkstemp creates it owner-only
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        if self._size is not None:
+            self._size += os.path.getsize(path) - old_size
+        if self.size() > self.max_bytes:
+            self.evict()
+        return entry
+
+    def _remove(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        if self._size is not None:
+            self._size -= size
+
+    def _files(self):
+        """Every stored response, ``<key>.rejected.json`` ones included."""
+        for sub in os.listdir(self.directory):
+            subdir = os.path.join(self.directory, sub)
+            if os.path.isdir(subdir):
+                for name in os.listdir(subdir):
+                    if name.endswith(".json"):
+                        yield os.path.join(subdir, name)
+
+    def size(self):
+        if self._size is None:
+            self._size = sum(os.path.getsize(p) for p in self._files())
+        return self._size
+
+    def evict(self, target_bytes=None):
+        """Drop expired entries, then least recently used ones down to ``target_bytes``."""
+        target_bytes = self.max_bytes * 0.9 if target_bytes is None else target_bytes
+        now = time.time()
+        files = sorted((os.stat(p).st_mtime, p) for p in self._files())
+        removed = 0
+        for _, path in files:
+            if self.size() <= target_bytes and not self._stale(path, now):
+                continue
+            self._remove(path)
+            removed += 1
+        return removed
+
+    def _stale(self, path, now):
+        # Same age rule as get: mtime is bumped on reads, "created" isn't
+        try:
+            with open(path, encoding="utf-8") as f:
+                return self._expired(json.load(f), now)
+        except (OSError, ValueError, KeyError):
+            return True
+
+    def entries(self, model_name=None):
+        """All live entries, oldest first."""
+        out = []
+        for path in self._files():
+            try:
+                with open(path, encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if self._expired(entry) or (model_name and entry["model"] != model_name):
+                continue
+            out.append(entry)
+        out.sort(key=lambda e: e["created"])
+        return out
+
+
+# === Model Wrapper ===
+class CachedModel:
+    """Wraps a model so identical prompts are answered from the cache.
+
+    Raw text is stored before anything tries to parse it, so a parser bug
+    never costs a second API call.
+    """
+
+    def __init__(self, model, cache, model_name=None, settings=None):
+        self.model = model
+        self.cache = cache
+        self.model_name = model_name or getattr(model, "model_name", type(model).__name__)
+        self.settings = settings or {}
+
+    def _lookup(self, prompt):
+        key = cache_key(self.model_name, prompt, self.settings)
+        entry = self.cache.get(key)
+        return key, (FakeResponse(entry["text"]) if entry else None)
+
+    def forget(self, prompt):
+        """Stop serving the cached answer to ``prompt`` (after it failed to parse).
+
+        The raw text is kept aside as ``<key>.rejected.json`` so replay still
+        sees it once the parser is fixed.
+        """
+        path = self.cache._path(cache_key(self.model_name, prompt, self.settings))
+        if os.path.exists(path):
+            os.replace(path, path[:-len(".json")] + ".rejected.json")
+
+    def _store(self, key, prompt, text):
+        self.cache.put(key, text, self.model_name, self.settings, prompt_targets(prompt))
+
+    def generate_content(self, prompt, stream=False):
+        key, cached = self._lookup(prompt)
+        if cached:
+            return iter([cached]) if stream else cached
+        if stream:
+            return self._record_stream(key, prompt, self.model.generate_content(prompt, stream=True))
+        response = self.model.generate_content(prompt)
+        self._store(key, prompt, response.text)
+        return response
+
+    async def generate_content_async(self, prompt, stream=False):
+        key, cached = self._lookup(prompt)
+        if cached:
+            return FakeStream([cached]) if stream else cached
+        if stream:
+            chunks = await self.model.generate_content_async(prompt, stream=True)
+            return self._record_stream_async(key, prompt, chunks)
+        response = await request_model(self.model, prompt)
+        self._store(key, prompt, response.text)
+        return response  # keeps usage_metadata for token accounting
+
+    # Streamed answers are cached once complete; a stream that breaks off isn't
+    def _record_stream(self, key, prompt, chunks):
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk.text)
+            yield chunk
+        self._store(key, prompt, "".join(parts))
+
+    async def _record_stream_async(self, key, prompt, chunks):
+        parts = []
+        async for chunk in chunks:
+            parts.append(chunk.text)
+            yield chunk
+        self._store(key, prompt, "".join(parts))
+
+
+# === Replay ===
+def replay(cache, sink, model_name=None, parse=clean_and_filter_json):
+    """Re-run parsing and filtering over every cached response, with no API calls.
+
+    Retries, bisected halves and rejected answers can cover the same word
+    more than once; the newest response wins and each word is written once.
+    """
+    stats = {"responses": 0, "rows": 0, "failed": 0, "duplicates": 0}
+    latest = {}
+    for entry in cache.entries(model_name):
+        stats["responses"] += 1
+        batch = entry["targets"]
+        try:
+            rows = batch_rows(batch, parse(extract_json_text(entry["text"]), your_words))
+        except Exception as e:
+            stats["failed"] += 1
+            print(f"⚠️ Cached response for {batch[:3]}... still fails to parse: {e}")
+            continue
+        for row in rows:
+            key = match_key(row[0])
+            if key in latest:
+                stats["duplicates"] += 1
+            latest[key] = row
+    rows = list(latest.values())
+    if rows:
+        sink([row[0] for row in rows], rows)
+    stats["rows"] = len(rows)
+    return stats
@@ -0,0 +1,172 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from beat_index import word_costs
+from decision_table import LOSS_PENALTY
+from metrics import metrics
+
+WORD_NAMES = list(word_costs)  # WORD_NAMES[id - 1] is the word with that ID
+
+
+def make_session(pool_size=4):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class AdaptivePoller:
+    """Decides how long to sleep between /get-word polls.
+
+    Once a couple of round changes have been seen, polls tightly in a window
+    around the next expected change and backs off exponentially elsewhere.
+    """
+
+    def __init__(self, min_interval=0.02, max_interval=1.0, window=0.5):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.window = window
+        self.round_seen_at = []
+        self.interval = min_interval
+
+    def round_changed(self, now):
+        self.round_seen_at.append(now)
+        self.interval = self.min_interval
+
+    def expected_change(self):
+        seen = self.round_seen_at
+        if len(seen) < 2:
+            return None
+        # Median gap is robust to one slow round
+        gaps = sorted(b - a for a, b in zip(seen, seen[1:]))
+        return seen[-1] + gaps[len(gaps) // 2]
+
+    def next_delay(self, now):
+        expected = self.expected_change()
+        if expected is not None:
+            until = expected - now
+            if until > self.window:
+                # Sleep most of the way there, but never past the tight window
+                return min(self.max_interval, until - self.window)
+            if until >= -self.window:
+                return self.min_interval
+        # No estimate yet, or the round is late: back off
+        delay = self.interval
+        self.interval = min(self.max_interval, self.interval * 2)
+        return delay
+
+
+class RoundEngine:
+    """Plays rounds against the game server over a keep-alive session.
+
+    The /status fetch for the previous round runs on a background thread so
+    it never delays answering the current one.
+    """
+
+    def __init__(self, host, session=None, poller=None, timeout=5.0, outcome_log=None):
+        host = host.rstrip("/")
+        self.get_url = f"{host}/get-word"
+        self.post_url = f"{host}/submit-word"
+        self.status_url = f"{host}/status"
+        self.session = session or make_session()
+        self.status_session = make_session(1)
+        self.poller = poller or AdaptivePoller()
+        self.timeout = timeout
+        self.outcome_log = outcome_log  # JSONL of server verdicts, read by decision_table.py
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="status")
+        self.latencies = []  # per round: seconds from word detected to submit answered
+        self.rounds = []
+
+    def wait_for_round(self, round_id):
+        """Poll until the server is on ``round_id``; return (word, detected_at)."""
+        while True:
+            with metrics.timer("http_request_seconds", endpoint="/get-word"):
+                data = self.session.get(self.get_url, timeout=self.timeout).json()
+            now = time.perf_counter()
+            if data["round"] == round_id:
+                self.poller.round_changed(now)
+                return data["word"], now
+            time.sleep(self.poller.next_delay(now))
+
+    def submit(self, player_id, round_id, word_id):
+        payload = {"player_id": player_id, "word_id": word_id, "round_id": round_id}
+        with metrics.timer("http_request_seconds", endpoint="/submit-word"):
+            response = self.session.post(self.post_url, json=payload, timeout=self.timeout)
+        return payload, response.json()
+
+    def _get_status(self):
+        with metrics.timer("http_request_seconds", endpoint="/status"):
+            return self.status_session.get(self.status_url, timeout=self.timeout).json()
+
+    def fetch_status(self):
+        return self.executor.submit(self._get_status)
+
+    def play_round(self, player_id, round_id, choose):
+        sys_word, detected_at = self.wait_for_round(round_id)
+        # Previous round is settled once a new one starts; fetch its status
+        # on the side while we answer this one
+        status = self.fetch_status() if round_id > 1 else None
+        picking = time.perf_counter()
+        word_id = choose(sys_word)
+        lookup = time.perf_counter() - picking
+        payload, result = self.submit(player_id, round_id, word_id)
+        latency = time.perf_counter() - detected_at
+        self.latencies.append(latency)
+        success = bool(result.get("success", False))
+        cost = word_costs[WORD_NAMES[word_id - 1]] + (0 if success else LOSS_PENALTY)
+        if metrics.enabled:
+            metrics.observe("lookup_seconds", lookup)
+            metrics.observe("detect_to_submit_seconds", latency)
+            metrics.observe("round_cost", cost)
+            metrics.inc("rounds_total", result="win" if success else "loss")
+            metrics.inc("cost_total", cost)
+            metrics.event("round", round=round_id, word=sys_word, word_id=word_id, success=success, cost=cost,
+                          lookup_ms=round(1000 * lookup, 3), latency_ms=round(1000 * latency, 2))
+        record = {
+            "round": round_id,
+            "word": sys_word,
+            "word_id": word_id,
+            "payload": payload,
+            "result": result,
+            "latency_ms": round(latency * 1000, 2),
+            "cost": cost,  # word price, plus the penalty if the server said it lost
+            "status": status,  # Future for the previous round's /status, or None
+        }
+        self.rounds.append(record)
+        if self.outcome_log:
+            self.log_outcome(sys_word, word_id, result)
+        return record
+
+    def log_outcome(self, sys_word, word_id, result):
+        line = json.dumps({"word": sys_word, "word_id": word_id,
+                           "success": bool(result.get("success", False)), "ts": time.time()})
+        with open(self.outcome_log, "a") as f:
+            f.write(line + "\n")
+
+    def play(self, player_id, choose, num_rounds, on_round=None):
+        for round_id in range(1, num_rounds + 1):
+            record = self.play_round(player_id, round_id, choose)
+            if on_round:
+                on_round(record)
+        return self.rounds
+
+    def latency_summary(self):
+        if not self.latencies:
+            return {}
+        ordered = sorted(self.latencies)
+        return {
+            "rounds": len(ordered),
+            "mean_ms": round(1000 * sum(ordered) / len(ordered), 2),
+            "p50_ms": round(1000 * ordered[len(ordered) // 2], 2),
+            "max_ms": round(1000 * ordered[-1], 2),
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.session.close()
+        self.status_session.close()
@@ -0,0 +1,214 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from beat_index import DEFAULT_COLUMNS, normalize_key, word_costs, word_ids
+from beatmap_merge import load_packed
+from decision_table import LOSS_PENALTY, load_fallback, load_table
+from fuzzy_index import FUZZY_THRESHOLD, FuzzyIndex
+from gen_schedule import FREQ_WORDS, NOUNS, read_words
+
+# === Offline Game Simulator ===
+# python simulate.py --rounds 5000000 [--truth a.csv] [--map b.csv] [--fallbacks all]
+# Plays sampled rounds without a server: system words are drawn from
+# freq-words.csv (Zipf-weighted by rank) and nounlist.txt (uniform), each
+# strategy picks from its own beat map, and the pick is scored against a
+# ground-truth map with the game's rule: word cost + 30 if it doesn't win.
+# Every (strategy, fallback) pair is scored on the same sampled words, so
+# differences between them come with a paired standard error.
+TRUTH = "large_beat_map_binary2.csv"
+KNOWN = "old_db.csv"  # what the strategies get to see; ~25% of the truth's words are missing
+PLAYER_FALLBACK = load_fallback(("Nuclear Bomb", 42))[0]  # what player.py falls back on today
+FALLBACKS = list(dict.fromkeys(["Pebble", "Nuclear Bomb", PLAYER_FALLBACK]))
+FREQ_SHARE = 0.5  # fraction of rounds drawn from freq-words.csv
+ROUNDS_PER_GAME = 5
+BATCH_ROUNDS = 20_000  # rounds vectorized at once per worker
+
+COSTS = np.array([word_costs[name] for name in DEFAULT_COLUMNS], dtype=np.int16)
+FALLBACK = -1  # pick meaning "use the fallback word"
+
+
+# === Word Pool ===
+def sample_pool(truth_keys, freq_words, nouns, freq_share=FREQ_SHARE):
+    """Return (words, probabilities) for system words the truth map can score."""
+    known = set(truth_keys)
+    weights = {}
+    freq = [w for w in dict.fromkeys(map(normalize_key, freq_words)) if w in known]
+    if freq:
+        zipf = 1.0 / np.arange(1, len(freq) + 1)
+        for word, w in zip(freq, freq_share * zipf / zipf.sum()):
+            weights[word] = weights.get(word, 0.0) + w
+    nouns = [w for w in dict.fromkeys(map(normalize_key, nouns)) if w in known]
+    if nouns:
+        share = (1 - freq_share) if freq else 1.0
+        for word in nouns:
+            weights[word] = weights.get(word, 0.0) + share / len(nouns)
+    words = list(weights)
+    p = np.array([weights[w] for w in words])
+    return words, p / p.sum()
+
+
+# === Strategies ===
+# Each returns one column index per pool word, or FALLBACK.
+def first_beater(matrix):
+    """Cheapest set column per row (columns are in cost order), FALLBACK if none."""
+    return np.where(matrix.any(axis=1), matrix.argmax(axis=1), FALLBACK)
+
+
+def lookup_picks(words, known, resolve=None):
+    """Cheapest beater from the ``known`` PackedMap, like BeatIndex.cheapest."""
+    row_of = {key: i for i, key in enumerate(known.keys)}
+    best = first_beater(known.bools())
+    picks = np.full(len(words), FALLBACK, dtype=np.int64)
+    for i, word in enumerate(words):
+        row = row_of.get(word)
+        if row is None and resolve is not None:
+            match = resolve(word)
+            row = None if match is None else row_of.get(match.key)
+        if row is not None:
+            picks[i] = best[row]
+    return picks
+
+
+def table_picks(words, table, fallback_picks):
+    """decision_table.csv where it has the word, ``fallback_picks`` elsewhere."""
+    column = {word_ids[name]: j for j, name in enumerate(DEFAULT_COLUMNS)}
+    picks = fallback_picks.copy()
+    for i, word in enumerate(words):
+        if word in table and table[word][0] in column:
+            picks[i] = column[table[word][0]]
+    return picks
+
+
+def build_strategies(words, truth_rows, known, table=None):
+    fuzzy = FuzzyIndex(known.keys)
+    strategies = {
+        "oracle": first_beater(truth_rows),  # knows the truth: a lower bound, not a player
+        "cheapest": lookup_picks(words, known),
+        "fuzzy": lookup_picks(words, known, lambda w: fuzzy.resolve(w, FUZZY_THRESHOLD)),
+        "blind": np.full(len(words), FALLBACK, dtype=np.int64),
+    }
+    if table:
+        strategies["table"] = table_picks(words, table, strategies["fuzzy"])
+    return strategies
+
+
+def cost_table(strategies, fallbacks, truth_rows):
+    """(combos, words) int16 cost of every (strategy, fallback) pick for every word."""
+    rows = np.arange(len(truth_rows))
+    combos, costs = [], []
+    for name, picks in strategies.items():
+        for fallback in fallbacks:
+            chosen = np.where(picks == FALLBACK, DEFAULT_COLUMNS.index(fallback), picks)
+            wins = truth_rows[rows, chosen]
+            combos.append((name, fallback))
+            costs.append(COSTS[chosen] + LOSS_PENALTY * ~wins)
+    return combos, np.array(costs, dtype=np.int16)
+
+
+# === Sampling (one shard per process) ===
+_shared = {}
+
+
+def _init_worker(costs, p):
+    _shared["costs"] = costs
+    _shared["cdf"] = np.cumsum(p)
+
+
+def run_shard(seed, rounds, baseline, batch_rounds=BATCH_ROUNDS):
+    """Sums, sums of squares and paired differences for ``rounds`` sampled rounds."""
+    costs, cdf = _shared["costs"], _shared["cdf"]
+    rng = np.random.default_rng(seed)
+    total = np.zeros(len(costs), dtype=np.int64)
+    squares = np.zeros(len(costs), dtype=np.int64)
+    diff_squares = np.zeros(len(costs), dtype=np.int64)
+    losses = np.zeros(len(costs), dtype=np.int64)
+    done = 0
+    while done < rounds:
+        n = min(batch_rounds, rounds - done)
+        idx = np.minimum(np.searchsorted(cdf, rng.random(n)), len(cdf) - 1)
+        sample = costs[:, idx].astype(np.int64)
+        total += sample.sum(axis=1)
+        squares += (sample * sample).sum(axis=1)
+        diff = sample - sample[baseline]
+        diff_squares += (diff * diff).sum(axis=1)
+        losses += (sample >= LOSS_PENALTY).sum(axis=1)  # no word costs 30 on its own
+        done += n
+    return total, squares, diff_squares, losses
+
+
+def simulate(costs, p, rounds, baseline=0, workers=None, seed=0, batch_rounds=BATCH_ROUNDS):
+    workers = workers or os.cpu_count() or 1
+    shards = max(1, min(workers * 4, rounds // batch_rounds or 1))
+    sizes = [rounds // shards + (i < rounds % shards) for i in range(shards)]
+    seeds = np.random.SeedSequence(seed).spawn(shards)
+    if workers == 1:
+        _init_worker(costs, p)
+        parts = [run_shard(s, n, baseline, batch_rounds) for s, n in zip(seeds, sizes)]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(costs, p)) as pool:
+            parts = list(pool.map(run_shard, seeds, sizes, [baseline] * shards, [batch_rounds] * shards))
+    total, squares, diff_squares, losses = (sum(x) for x in zip(*parts))
+    mean = total / rounds
+    std = np.sqrt(np.maximum(squares / rounds - mean ** 2, 0))
+    diff_mean = mean - mean[baseline]
+    diff_std = np.sqrt(np.maximum(diff_squares / rounds - diff_mean ** 2, 0))
+    return {
+        "mean": mean,
+        "stderr": std / np.sqrt(rounds),
+        "diff": diff_mean,
+        "diff_stderr": diff_std / np.sqrt(rounds),
+        "loss_rate": losses / rounds,
+        "expected": costs.astype(float) @ p,  # exact, for checking the sample
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare strategies and fallback words offline")
+    parser.add_argument("--rounds", type=int, default=1_000_000)
+    parser.add_argument("--truth", default=TRUTH, help="beat map treated as the server's verdicts")
+    parser.add_argument("--map", default=KNOWN, help="beat map the strategies look words up in")
+    parser.add_argument("--table", default="decision_table.csv", help="adds the 'table' strategy if present")
+    parser.add_argument("--fallbacks", nargs="*", default=FALLBACKS, help="player words, or 'all'")
+    parser.add_argument("--freq-share", type=float, default=FREQ_SHARE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top", type=int, default=3, help="best fallbacks to print per strategy")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    fallbacks = DEFAULT_COLUMNS if args.fallbacks == ["all"] else args.fallbacks
+    fallbacks = list(dict.fromkeys([*fallbacks, PLAYER_FALLBACK]))  # the baseline needs it
+    truth = load_packed(args.truth)
+    known = load_packed(args.map)
+    words, p = sample_pool(truth.keys, read_words(FREQ_WORDS), read_words(NOUNS), args.freq_share)
+    row_of = {key: i for i, key in enumerate(truth.keys)}
+    truth_rows = truth.bools(np.array([row_of[w] for w in words]))
+    strategies = build_strategies(words, truth_rows, known, load_table(args.table))
+    combos, costs = cost_table(strategies, fallbacks, truth_rows)
+    # Baseline: what the players run today (decision table if built, else fuzzy) with their fallback
+    baseline = combos.index(("table" if "table" in strategies else "fuzzy", PLAYER_FALLBACK))
+    unknown = np.mean(~np.isin(words, known.keys))
+    print(f"🎲 {len(words)} system words ({unknown:.1%} unknown to {args.map}), "
+          f"{len(combos)} strategy/fallback pairs, set up in {time.perf_counter() - started:.2f}s")
+
+    started = time.perf_counter()
+    result = simulate(costs, p, args.rounds, baseline, args.workers, args.seed)
+    elapsed = time.perf_counter() - started
+    print(f"⚡ {args.rounds:,} rounds x {len(combos)} pairs in {elapsed:.2f}s "
+          f"({args.rounds * len(combos) / elapsed:,.0f} scored rounds/s)")
+
+    base_name = " / ".join(combos[baseline])
+    print(f"\n{'strategy':<10} {'fallback':<18} {'cost/round':>11} {'±':>6} {'exact':>7} "
+          f"{'losses':>7} {'vs ' + base_name:>26}")
+    order = np.argsort(result["mean"], kind="stable")
+    for name in dict.fromkeys(combos[i][0] for i in order):  # strategies, best first
+        for i in [i for i in order if combos[i][0] == name][:args.top]:
+            fallback = combos[i][1]
+            delta = "baseline" if i == baseline else f"{result['diff'][i]:+.3f} ± {result['diff_stderr'][i]:.3f}"
+            print(f"{name:<10} {fallback:<18} {result['mean'][i]:>11.3f} {result['stderr'][i]:>6.3f} "
+                  f"{result['expected'][i]:>7.3f} {result['loss_rate'][i]:>7.1%} {delta:>26}")
+    print(f"\n🏁 Baseline {base_name}: ${result['mean'][baseline] * ROUNDS_PER_GAME:.2f} per {ROUNDS_PER_GAME}-round game")
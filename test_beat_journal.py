@@ -0,0 +1,106 @@
+import csv
+import os
+
+import beat_journal
+from beat_journal import BeatJournal, open_journal
+
+COLUMNS = ["Feather", "Coal", "Pebble"]
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["word"] + COLUMNS)
+        writer.writerows(rows)
+
+
+def committed_journal(tmp_path):
+    path = str(tmp_path / "map.journal")
+    journal = BeatJournal(path, COLUMNS)
+    journal.commit([["Lion", 1, 0, 1], ["Fire", 0, 1, 0]])
+    return path, os.path.getsize(path)
+
+
+def test_replay_keeps_committed_rows(tmp_path):
+    path, _ = committed_journal(tmp_path)
+    journal = BeatJournal(path, COLUMNS)
+    assert sorted(journal.rows) == ["fire", "lion"]
+    assert journal.rows["lion"] == ("Lion", 0b101)
+    assert journal.batches == 1
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    path, size = committed_journal(tmp_path)
+    second = BeatJournal(path, COLUMNS)
+    second.commit([["Water", 1, 1, 1]])
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 3)  # crash halfway through the COMMIT
+    journal = BeatJournal(path, COLUMNS)
+    assert "water" not in journal
+    assert len(journal) == 2
+    assert os.path.getsize(path) == size
+
+
+def test_zero_filled_tail_is_truncated(tmp_path):
+    path, size = committed_journal(tmp_path)
+    with open(path, "ab") as f:
+        f.write(b"\0" * 16)  # what a power loss often leaves behind
+    journal = BeatJournal(path, COLUMNS)
+    assert len(journal) == 2
+    assert os.path.getsize(path) == size
+    journal.commit([["Water", 1, 1, 1]])
+    assert "water" in BeatJournal(path, COLUMNS)
+
+
+def test_uncommitted_rows_are_dropped(tmp_path):
+    path, size = committed_journal(tmp_path)
+    with open(path, "ab") as f:
+        f.write(beat_journal._record(beat_journal.ROW, b"\x05\x00Water" + b"\x07" + b"\0" * 7))
+    journal = BeatJournal(path, COLUMNS)
+    assert "water" not in journal
+    assert os.path.getsize(path) == size
+
+
+def test_crash_during_seeding_reseeds(tmp_path, monkeypatch):
+    csv_path = str(tmp_path / "map.csv")
+    write_csv(csv_path, [[f"word{i}", 1, 0, 0] for i in range(10)])
+    real_import = BeatJournal.import_csv
+
+    def crash_midway(self, path):
+        real_import(self, path, chunk=3)
+        raise KeyboardInterrupt  # killed before the import finished
+
+    monkeypatch.setattr(BeatJournal, "import_csv", crash_midway)
+    try:
+        open_journal(csv_path)
+    except KeyboardInterrupt:
+        pass
+    assert not os.path.exists(beat_journal.default_journal_path(csv_path))
+
+    monkeypatch.undo()
+    journal = open_journal(csv_path)
+    assert len(journal) == 10
+    assert journal.path == beat_journal.default_journal_path(csv_path)
+    assert len(BeatJournal(journal.path)) == 10
+
+
+def test_seeding_keeps_last_duplicate_row(tmp_path):
+    csv_path = str(tmp_path / "map.csv")
+    rows = [["lion", 1, 0, 0]] + [[f"word{i}", 0, 0, 1] for i in range(600)] + [["Lion", 0, 1, 0]]
+    write_csv(csv_path, rows)
+    journal = BeatJournal(str(tmp_path / "map.journal"), COLUMNS)
+    assert journal.import_csv(csv_path, chunk=500) == 601
+    assert journal.rows["lion"] == ("Lion", 0b010)  # Coal, as BeatIndex picks
+
+
+def test_rows_added_to_csv_survive_compaction(tmp_path):
+    csv_path = str(tmp_path / "map.csv")
+    write_csv(csv_path, [["Lion", 1, 0, 0]])
+    open_journal(csv_path).compact_csv(csv_path)
+    with open(csv_path, "a", newline="") as f:
+        csv.writer(f).writerow(["zzmergedword", 0, 1, 0])  # a merge or hand edit
+    journal = open_journal(csv_path)
+    journal.compact_csv(csv_path)
+    assert "zzmergedword" in journal
+    with open(csv_path) as f:
+        assert "zzmergedword" in f.read()
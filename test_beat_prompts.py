@@ -0,0 +1,55 @@
+import pytest
+
+from beat_prompts import BeatStreamParser, extract_json_text, parse_beats
+
+
+def stream(text, size):
+    parser = BeatStreamParser()
+    for i in range(0, len(text), size):
+        parser.feed(text[i:i + size])
+    parser.close()
+    return parser
+
+
+RESPONSES = [
+    '{"Lion": ["Gun", "Fire"], "Flood": "Water"}',
+    "// beats\n{'Earth\\'s Core': ['Earth\\'s Core'], 'Fear': ['Logic', 'Human Spirit',],}",
+    'Here is the {JSON}:\n```json\n{"Lion": ["gun", "GUN"]}\n```',
+    '{"Lion": {"beaters": ["Gun"]}, "Fire": ["Water"]}',
+]
+
+
+@pytest.mark.parametrize("text", RESPONSES)
+@pytest.mark.parametrize("size", [1, 3, 64])
+def test_stream_matches_whole_text(text, size):
+    assert stream(text, size).results == parse_beats(text)
+
+
+def test_nested_object_is_skipped_not_empty():
+    assert parse_beats('{"Lion": {"beaters": ["Gun"]}, "Fire": ["Water"]}') == {"Fire": ["Water"]}
+    assert parse_beats('{"Lion": [["Gun"]], "Fire": "Water"}') == {"Fire": ["Water"]}
+    assert parse_beats('{"Lion": 5, "Fire": ["Water"]}') == {"Fire": ["Water"]}
+
+
+def test_fenced_block_wins_over_prose():
+    text = 'Here is the {JSON}:\n```json{"Lion": ["Gun"]}```'
+    assert parse_beats(text) == {"Lion": ["Gun"]}
+    assert extract_json_text(text) == '{"Lion": ["Gun"]}'
+
+
+def test_quotes_comments_and_duplicates():
+    text = "{'Earth\\'s Core': ['Earth\\'s Core'], /* x */ 'Fear': ['logic', 'Logic']}"
+    assert parse_beats(text) == {"Earth's Core": ["Earth's Core"], "Fear": ["Logic"]}
+
+
+def test_empty_answers():
+    assert parse_beats("{}") == {}
+    assert parse_beats('{"Lion": []}') == {"Lion": []}
+    with pytest.raises(ValueError):
+        parse_beats("no JSON here")
+
+
+def test_truncated_response_keeps_finished_entries():
+    parser = stream('{"Lion": ["Gun"], "Fire": ["Wat', 5)
+    assert parser.results == {"Lion": ["Gun"]}
+    assert not parser.finished